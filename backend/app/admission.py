@@ -0,0 +1,192 @@
+"""
+Admission control for chat turns.
+
+Every turn takes one of ADMISSION_MAX_CONCURRENCY slots before it runs. Turns
+that cannot start at once wait in a bounded queue; a full queue, an API key
+over its concurrency quota, or a wait longer than the queue timeout is refused
+at once with a retry hint instead of piling more calls onto a slow upstream.
+Turns of the same conversation run one at a time, in arrival order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .config import get_settings
+from .telemetry import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    A turn was shed; `retry_after` is the suggested wait in whole seconds.
+    """
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Conversation:
+    lock: asyncio.Lock
+    users: int = 0
+
+
+@dataclass
+class Ticket:
+    """
+    An admitted turn; hand it back to AdmissionController.release exactly once.
+    """
+
+    api_key: str
+    conversation_id: str | None
+    admitted_at: float
+    released: bool = False
+
+
+class AdmissionController:
+    """
+    Bounded admission queue with per-key quotas and per-conversation ordering.
+
+    `per_key_limit` counts a key's running and queued turns; requests without an
+    API key (empty `api_key`) are not subject to it. A limit of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+        per_key_limit: int,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.per_key_limit = per_key_limit
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._per_key: dict[str, int] = {}
+        self._conversations: dict[str, _Conversation] = {}
+        # Moving average of how long an admitted turn holds its slot, used for
+        # Retry-After.
+        self._turn_seconds = 1.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def _retry_after(self, turns_ahead: int) -> int:
+        seconds = self._turn_seconds * max(1, turns_ahead) / self.max_concurrency
+        return min(60, max(1, math.ceil(seconds)))
+
+    def _reject(self, reason: str, turns_ahead: int) -> AdmissionRejected:
+        ADMISSION_REJECTED.inc(reason=reason)
+        return AdmissionRejected(reason, self._retry_after(turns_ahead))
+
+    async def acquire(self, api_key: str = "", conversation_id: str | None = None) -> Ticket:
+        """
+        Wait for a slot, or raise AdmissionRejected without waiting when the
+        queue is full or the key is over its quota.
+        """
+        if api_key and self.per_key_limit and self._per_key.get(api_key, 0) >= self.per_key_limit:
+            # The key's own turns have to finish first.
+            raise self._reject("key_quota", self.max_concurrency)
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            raise self._reject("queue_full", self._waiting + 1)
+
+        self._per_key[api_key] = self._per_key.get(api_key, 0) + 1
+        conversation = None
+        if conversation_id is not None:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                conversation = _Conversation(asyncio.Lock())
+                self._conversations[conversation_id] = conversation
+            conversation.users += 1
+
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        start = time.monotonic()
+        has_lock = has_slot = False
+        try:
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                if conversation is not None:
+                    await conversation.lock.acquire()
+                    has_lock = True
+                await self._slots.acquire()
+                has_slot = True
+        except TimeoutError:
+            raise self._reject("queue_timeout", self._waiting) from None
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.set(self._waiting)
+            ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start)
+            if not has_slot:
+                if has_lock:
+                    conversation.lock.release()  # type: ignore[union-attr]
+                self._forget(api_key, conversation_id)
+
+        ADMISSION_IN_FLIGHT.inc()
+        return Ticket(api_key, conversation_id, time.monotonic())
+
+    def release(self, ticket: Ticket) -> None:
+        if ticket.released:
+            return
+        ticket.released = True
+        held = time.monotonic() - ticket.admitted_at
+        self._turn_seconds = 0.9 * self._turn_seconds + 0.1 * held
+        ADMISSION_IN_FLIGHT.dec()
+        self._slots.release()
+        if ticket.conversation_id is not None:
+            self._conversations[ticket.conversation_id].lock.release()
+        self._forget(ticket.api_key, ticket.conversation_id)
+
+    def _forget(self, api_key: str, conversation_id: str | None) -> None:
+        count = self._per_key[api_key] - 1
+        if count:
+            self._per_key[api_key] = count
+        else:
+            del self._per_key[api_key]
+        if conversation_id is not None:
+            conversation = self._conversations[conversation_id]
+            conversation.users -= 1
+            if not conversation.users:
+                del self._conversations[conversation_id]
+
+    @asynccontextmanager
+    async def admit(
+        self, api_key: str = "", conversation_id: str | None = None
+    ) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire(api_key, conversation_id)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController | None:
+    """
+    Return the per-worker admission controller, or None when
+    ADMISSION_MAX_CONCURRENCY is 0.
+    """
+    settings = get_settings()
+    if settings["admission_max_concurrency"] <= 0:
+        return None
+    return AdmissionController(
+        settings["admission_max_concurrency"],
+        settings["admission_max_queue"],
+        settings["admission_queue_timeout_seconds"],
+        settings["admission_per_key_concurrency"],
+    )
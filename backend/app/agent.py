@@ -1,16 +1,59 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Literal, TypedDict
-
-from .llm_client import chat_completion
+import logging
+import time
+from collections.abc import AsyncIterator
+from typing import Any, Literal, TypedDict, Union
+
+from . import serialization
+from .cache import answer_cache_key, get_answer_cache
+from .config import get_settings
+from .conversation_state import (
+    observe_messages,
+    record_tool_calls,
+    state_summary,
+    state_tool_call,
+)
+from .history import recent_turns, window_history
+from .llm_client import (
+    LLMUnavailableError,
+    chat_completion,
+    chat_completion_stream,
+    chat_completion_tool_calls,
+    model_for_stage,
+)
+from .router import (
+    extract_order_reference,
+    follow_up_calls,
+    render_tool_result,
+    route_policy_question,
+)
 from .schemas import ActionMetadata, ChatMessage
+from .telemetry import (
+    DECISION_ESCALATIONS,
+    DECISION_RETRIES,
+    PREFETCHES,
+    STATE_SHORTCUTS,
+    STAGE_SECONDS,
+    TOOL_SECONDS,
+    TURNS,
+    span,
+)
 from .tools import (
     evaluate_refund_eligibility,
+    evaluate_refund_eligibility_for_customer,
     get_policy_answer,
     list_recent_orders,
     lookup_order,
 )
+from .tools.specs import TOOL_SPECS
+
+
+logger = logging.getLogger(__name__)
+
+ToolCall = tuple[str, dict[str, Any]]
 
 
 class ActionObject(TypedDict, total=False):
@@ -18,55 +61,151 @@ class ActionObject(TypedDict, total=False):
     clarifying_question: str
     tool_name: str
     tool_args: dict[str, Any]
+    tool_calls: list[dict[str, Any]]
     answer_text: str
+    confidence: float
+
+
+class TurnPlan(TypedDict, total=False):
+    metadata: ActionMetadata
+    text: str
+    tool_name: str
+    tool_result: dict[str, Any]
+
+
+TurnEvent = tuple[str, Union[ActionMetadata, ChatMessage, str]]
+
+
+TOOL_NAMES: tuple[str, ...] = (
+    "lookup_order",
+    "list_recent_orders",
+    "evaluate_refund_eligibility",
+    "evaluate_refund_eligibility_for_customer",
+    "get_policy_answer",
+)
+
+# The system prompts and action schema never change at runtime. Keeping them as
+# module constants makes every decision request share a byte-identical prefix,
+# which is what the provider's prompt cache keys on.
+_PROMPT_INTRO = (
+    "You are Bookly's formal and concise customer support agent. "
+    "You assist customers with order status, returns and refunds, and general "
+    "policy questions (shipping, refunds, password reset). "
+)
+
+_PROMPT_TOOLS = (
+    "Tools:\n"
+    "- lookup_order(order_id, email_or_last_name): use when the user provides or "
+    "can reasonably be asked for a specific order id; verifies that the order "
+    "belongs to the customer.\n"
+    "- list_recent_orders(email): use when the user mentions \"my last order\" or "
+    "similar and only provides an email.\n"
+    "- evaluate_refund_eligibility(order_id, reason): use when the user clearly "
+    "wants a return or refund and you know which order they mean.\n"
+    "- evaluate_refund_eligibility_for_customer(email): use when the user asks "
+    "which of their orders, or whether all of them, can be refunded.\n"
+    "- get_policy_answer(topic): use for general policy questions about "
+    "\"shipping\", \"returns\", \"refunds\", or \"password_reset\".\n\n"
+    "Guidelines:\n"
+    "- Ask a clarifying question when you are missing essential information, "
+    "such as order id or email.\n"
+    "- Never invent order ids or shipment events; use tools for order data.\n"
+    "- When a question needs several independent lookups, request them together.\n"
+)
+
+SYSTEM_PROMPT: str = (
+    _PROMPT_INTRO
+    + "You must ALWAYS respond with a single valid JSON object describing your "
+    "next action, without any additional commentary.\n\n"
+    "Action schema:\n"
+    "{\n"
+    '  \"action\": \"ask_clarification\" | \"call_tool\" | \"answer\",\n'
+    '  \"clarifying_question\": string (optional),\n'
+    '  \"tool_name\": \"lookup_order\" | \"list_recent_orders\" | '
+    '\"evaluate_refund_eligibility\" | \"evaluate_refund_eligibility_for_customer\" | '
+    '\"get_policy_answer\" (optional),\n'
+    '  \"tool_args\": object with the exact arguments for the tool (optional),\n'
+    '  \"tool_calls\": list of {\"tool_name\", \"tool_args\"} objects (optional, '
+    'instead of tool_name and tool_args when several independent tools are needed),\n'
+    '  \"answer_text\": string (optional, final user-facing answer),\n'
+    '  \"confidence\": number from 0 to 1, how sure you are that this is the right '
+    'action (optional)\n'
+    "}\n\n"
+    + _PROMPT_TOOLS
+    + "- For out-of-scope questions, set action=\"answer\" and answer_text to a "
+    "polite explanation that the question is outside Bookly's scope.\n"
+    "Return ONLY the JSON object, nothing else."
+)
+
+# Variant for DECISION_MODE=tools, where the decision arrives as a function call.
+TOOLS_SYSTEM_PROMPT: str = (
+    _PROMPT_INTRO
+    + "Always respond with function calls: one or more tools to look up data, "
+    "ask_clarification to ask the customer for missing details, or answer to reply "
+    "directly.\n\n"
+    + _PROMPT_TOOLS
+    + "- For out-of-scope questions, call answer with a polite explanation that the "
+    "question is outside Bookly's scope.\n"
+)
+
+_DECISION_SYSTEM_MESSAGE: dict[str, str] = {"role": "system", "content": SYSTEM_PROMPT}
+_TOOLS_DECISION_SYSTEM_MESSAGE: dict[str, str] = {
+    "role": "system",
+    "content": TOOLS_SYSTEM_PROMPT,
+}
+
+# Appended after the conversation on retry, so the cached prefix is still reused.
+_RETRY_MESSAGE: dict[str, str] = {
+    "role": "system",
+    "content": "The previous response was invalid. Return ONLY a valid JSON object.",
+}
+
+_ANSWER_SYSTEM_MESSAGE: dict[str, str] = {
+    "role": "system",
+    "content": (
+        "You are Bookly's formal and concise support agent. "
+        "Given the user's question and the structured tool result, "
+        "write a short, professional answer. Do not mention internal tools."
+    ),
+}
+
+
+# Served without an LLM call while the provider is failing.
+DEGRADED_REPLY: str = (
+    "I'm sorry, our assistant is temporarily unavailable. Please try again in a few "
+    "minutes."
+)
 
 
 def build_system_prompt() -> str:
     """
     System prompt encoding the Bookly domain, tools, and required action schema.
     """
-    return (
-        "You are Bookly's formal and concise customer support agent. "
-        "You assist customers with order status, returns and refunds, and general "
-        "policy questions (shipping, refunds, password reset). "
-        "You must ALWAYS respond with a single valid JSON object describing your "
-        "next action, without any additional commentary.\n\n"
-        "Action schema:\n"
-        "{\n"
-        '  \"action\": \"ask_clarification\" | \"call_tool\" | \"answer\",\n'
-        '  \"clarifying_question\": string (optional),\n'
-        '  \"tool_name\": \"lookup_order\" | \"list_recent_orders\" | '
-        '\"evaluate_refund_eligibility\" | \"get_policy_answer\" (optional),\n'
-        '  \"tool_args\": object with the exact arguments for the tool (optional),\n'
-        '  \"answer_text\": string (optional, final user-facing answer)\n'
-        "}\n\n"
-        "Tools:\n"
-        "- lookup_order(order_id, email_or_last_name): use when the user provides or "
-        "can reasonably be asked for a specific order id; verifies that the order "
-        "belongs to the customer.\n"
-        "- list_recent_orders(email): use when the user mentions \"my last order\" or "
-        "similar and only provides an email.\n"
-        "- evaluate_refund_eligibility(order_id, reason): use when the user clearly "
-        "wants a return or refund and you know which order they mean.\n"
-        "- get_policy_answer(topic): use for general policy questions about "
-        "\"shipping\", \"returns\", \"refunds\", or \"password_reset\".\n\n"
-        "Guidelines:\n"
-        "- Ask a clarifying question when you are missing essential information, "
-        "such as order id or email.\n"
-        "- Never invent order ids or shipment events; use tools for order data.\n"
-        "- For out-of-scope questions, set action=\"answer\" and answer_text to a "
-        "polite explanation that the question is outside Bookly's scope.\n"
-        "Return ONLY the JSON object, nothing else."
-    )
+    return SYSTEM_PROMPT
 
 
-def _build_decision_messages(messages: list[ChatMessage]) -> list[dict[str, Any]]:
+def _build_decision_messages(
+    messages: list[ChatMessage],
+    summary: str | None = None,
+    system_message: dict[str, str] = _DECISION_SYSTEM_MESSAGE,
+    known_details: str | None = None,
+) -> list[dict[str, Any]]:
     """
     Convert typed messages into the dict format expected by the OpenAI client for
     the decision step, prefixing a system message with behavior and schema.
+
+    Only the conversation tail varies between requests; the leading system message
+    is the same object every time.
     """
-    system_message = {"role": "system", "content": build_system_prompt()}
-    converted = [system_message]
+    converted: list[dict[str, Any]] = [system_message]
+    if summary:
+        converted.append(
+            {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+        )
+    if known_details:
+        converted.append(
+            {"role": "system", "content": f"Details the customer already gave: {known_details}"}
+        )
     for m in messages:
         converted.append({"role": m.role, "content": m.content})
     return converted
@@ -74,7 +213,7 @@ def _build_decision_messages(messages: list[ChatMessage]) -> list[dict[str, Any]
 
 def _parse_action_object(raw: str) -> ActionObject:
     try:
-        data = json.loads(raw)
+        data = serialization.loads(raw)
     except json.JSONDecodeError as exc:
         raise ValueError(f"Model did not return valid JSON: {exc}") from exc
 
@@ -89,13 +228,7 @@ def _parse_action_object(raw: str) -> ActionObject:
 
     # Model sometimes returns the tool name as the action, e.g.:
     # { "action": "lookup_order", "order_id": "...", "email_or_last_name": "..." }
-    tool_like_actions = {
-        "lookup_order",
-        "list_recent_orders",
-        "evaluate_refund_eligibility",
-        "get_policy_answer",
-    }
-    if isinstance(action, str) and action in tool_like_actions:
+    if isinstance(action, str) and action in TOOL_NAMES:
         tool_args = data.get("tool_args")
         if not isinstance(tool_args, dict):
             # Treat all other top-level fields as arguments.
@@ -116,42 +249,153 @@ def _parse_action_object(raw: str) -> ActionObject:
     )
 
 
-def _decide_next_action(messages: list[ChatMessage]) -> ActionObject:
+def _action_from_tool_calls(content: str, calls: list[tuple[str, str]]) -> ActionObject:
     """
-    Call the LLM to obtain an action object, with a single retry on schema failure.
+    Map a function-calling response onto the action object used by the agent.
     """
-    decision_messages = _build_decision_messages(messages)
-    raw = chat_completion(decision_messages, temperature=0.1)
+    if not calls:
+        if content:
+            return {"action": "answer", "answer_text": content}
+        raise ValueError("Model returned neither a function call nor content.")
 
-    try:
-        return _parse_action_object(raw)
-    except ValueError:
-        retry_system = {
-            "role": "system",
-            "content": (
-                build_system_prompt()
-                + "\nThe previous response was invalid. Return ONLY a valid JSON object."
-            ),
+    parsed: list[ToolCall] = []
+    for name, raw_args in calls:
+        try:
+            args = serialization.loads(raw_args or "{}")
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Function arguments are not valid JSON: {exc}") from exc
+        if not isinstance(args, dict):
+            raise ValueError("Function arguments must be a JSON object.")
+        parsed.append((name, args))
+
+    tool_calls = [(name, args) for name, args in parsed if name in TOOL_NAMES]
+    if tool_calls:
+        name, args = tool_calls[0]
+        return {
+            "action": "call_tool",
+            "tool_name": name,
+            "tool_args": args,
+            "tool_calls": [{"tool_name": n, "tool_args": a} for n, a in tool_calls],
+        }
+
+    name, args = parsed[0]
+    if name == "ask_clarification":
+        return {
+            "action": "ask_clarification",
+            "clarifying_question": str(args.get("clarifying_question", "")),
         }
-        retry_messages = [retry_system] + decision_messages[1:]
-        raw_retry = chat_completion(retry_messages, temperature=0.0)
+    if name == "answer":
+        return {"action": "answer", "answer_text": str(args.get("answer_text", ""))}
+
+    raise ValueError(f"Unknown function: {name}")
+
+
+def _low_confidence(action_obj: ActionObject, threshold: float) -> bool:
+    confidence = action_obj.get("confidence")
+    # A decision without a confidence is taken at face value.
+    if not isinstance(confidence, (int, float)) or isinstance(confidence, bool):
+        return False
+    return confidence < threshold
+
+
+async def _decide_next_action(
+    messages: list[ChatMessage],
+    conversation_id: str | None = None,
+    known_details: str | None = None,
+) -> ActionObject:
+    """
+    Call the LLM to obtain an action object.
+
+    The decision runs on the model routed to the "decision" stage. A schema failure
+    is retried once on OPENAI_MODEL, and so is a decision whose confidence is below
+    DECISION_MIN_CONFIDENCE when a smaller model made it. With `known_details`
+    from the conversation state, only the last few turns are sent alongside them
+    instead of the summarized history.
+    """
+    settings = get_settings()
+    with span("decide") as decide_span:
+        if known_details:
+            summary = None
+            recent_messages = recent_turns(
+                messages, settings["conversation_state_history_turns"]
+            )
+        else:
+            summary, recent_messages = await window_history(messages, conversation_id)
+
+        if settings["decision_mode"] == "tools":
+            tool_messages = _build_decision_messages(
+                recent_messages, summary, _TOOLS_DECISION_SYSTEM_MESSAGE, known_details
+            )
+            content, calls = await chat_completion_tool_calls(
+                tool_messages, TOOL_SPECS, temperature=0.1
+            )
+            try:
+                return _action_from_tool_calls(content, calls)
+            except ValueError:
+                # Rare with strict schemas; fall back to JSON prompting below.
+                pass
+
+        decision_messages = _build_decision_messages(
+            recent_messages, summary, known_details=known_details
+        )
+        raw = await chat_completion(decision_messages, temperature=0.1, stage="decision")
+        # Retries and escalations go to the larger model even when the decision
+        # itself is served by OPENAI_SMALL_MODEL.
+        large_model = settings["openai_model"]
 
         try:
-            return _parse_action_object(raw_retry)
+            action_obj = _parse_action_object(raw)
         except ValueError:
-            # If the model still does not follow the schema, fall back to treating
-            # its response as a direct answer to the user.
-            fallback_text = raw_retry or raw or (
-                "I could not reliably interpret your request, but here is my best attempt "
-                "to respond based on the information provided."
+            DECISION_RETRIES.inc()
+            DECISION_ESCALATIONS.inc(reason="parse_error")
+            decide_span.set_attribute("retries", 1)
+            retry_messages = decision_messages + [_RETRY_MESSAGE]
+            raw_retry = await chat_completion(
+                retry_messages, temperature=0.0, stage="decision_retry", model=large_model
             )
-            return {
-                "action": "answer",
-                "answer_text": fallback_text,
-            }
+
+            try:
+                return _parse_action_object(raw_retry)
+            except ValueError:
+                # If the model still does not follow the schema, fall back to treating
+                # its response as a direct answer to the user.
+                fallback_text = raw_retry or raw or (
+                    "I could not reliably interpret your request, but here is my best attempt "
+                    "to respond based on the information provided."
+                )
+                return {
+                    "action": "answer",
+                    "answer_text": fallback_text,
+                }
+
+        if model_for_stage("decision") != large_model and _low_confidence(
+            action_obj, settings["decision_min_confidence"]
+        ):
+            DECISION_ESCALATIONS.inc(reason="low_confidence")
+            decide_span.set_attribute("escalated", True)
+            raw_escalated = await chat_completion(
+                decision_messages, temperature=0.1, stage="decision_escalation", model=large_model
+            )
+            try:
+                return _parse_action_object(raw_escalated)
+            except ValueError:
+                # The small model's decision is still usable.
+                pass
+        return action_obj
 
 
 def _call_tool(tool_name: str, tool_args: dict[str, Any]) -> dict[str, Any]:
+    # The name comes from the model; keep made-up names out of metric labels.
+    label = tool_name if tool_name in TOOL_NAMES else "unknown"
+    with span("tool", tool=label):
+        start = time.perf_counter()
+        try:
+            return _run_tool(tool_name, tool_args)
+        finally:
+            TOOL_SECONDS.observe(time.perf_counter() - start, tool=label)
+
+
+def _run_tool(tool_name: str, tool_args: dict[str, Any]) -> dict[str, Any]:
     if tool_name == "lookup_order":
         return lookup_order(
             order_id=str(tool_args.get("order_id", "")),
@@ -166,6 +410,8 @@ def _call_tool(tool_name: str, tool_args: dict[str, Any]) -> dict[str, Any]:
             order_id=str(tool_args.get("order_id", "")),
             reason=str(tool_args.get("reason", "")),
         )
+    if tool_name == "evaluate_refund_eligibility_for_customer":
+        return evaluate_refund_eligibility_for_customer(email=str(tool_args.get("email", "")))
     if tool_name == "get_policy_answer":
         topic = str(tool_args.get("topic", ""))
         policy = get_policy_answer(topic)
@@ -174,101 +420,413 @@ def _call_tool(tool_name: str, tool_args: dict[str, Any]) -> dict[str, Any]:
     raise ValueError(f"Unknown tool: {tool_name}")
 
 
-def _build_answer_from_tool(
+def _tool_call_key(tool_name: str, tool_args: dict[str, Any]) -> tuple[Any, ...]:
+    """
+    Identity of a tool call up to case and surrounding whitespace in its arguments.
+    """
+    return (
+        tool_name,
+        tuple(sorted((k, str(v).strip().lower()) for k, v in tool_args.items())),
+    )
+
+
+class _Prefetch(TypedDict):
+    key: tuple[Any, ...]
+    task: asyncio.Task[dict[str, Any] | None]
+    used: bool
+
+
+# The event loop only keeps weak references to tasks; this keeps running
+# prefetches alive until they finish.
+_PREFETCH_TASKS: set[asyncio.Task[dict[str, Any] | None]] = set()
+
+
+async def _prefetch_tool(tool_name: str, tool_args: dict[str, Any]) -> dict[str, Any] | None:
+    try:
+        return await asyncio.to_thread(_call_tool, tool_name, tool_args)
+    except Exception:
+        logger.warning("Speculative %s failed.", tool_name, exc_info=True)
+        return None
+
+
+def _start_prefetch(text: str) -> _Prefetch | None:
+    """
+    Start lookup_order in the background when the message names an order and an
+    email, so the lookup overlaps with the decision round trip.
+    """
+    reference = extract_order_reference(text)
+    if reference is None:
+        return None
+    order_id, email = reference
+    tool_args = {"order_id": order_id, "email_or_last_name": email}
+    task = asyncio.create_task(_prefetch_tool("lookup_order", tool_args))
+    _PREFETCH_TASKS.add(task)
+    task.add_done_callback(_PREFETCH_TASKS.discard)
+    return {"key": _tool_call_key("lookup_order", tool_args), "task": task, "used": False}
+
+
+async def _run_tool_calls(
+    calls: list[ToolCall],
+    prefetch: _Prefetch | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Run tool calls and return their results in order.
+
+    Calls run on the default thread pool, so store I/O never blocks the event
+    loop and several calls overlap. A call matching the speculative prefetch
+    reuses its result.
+    """
+
+    async def run(tool_name: str, tool_args: dict[str, Any]) -> dict[str, Any]:
+        if prefetch is not None and prefetch["key"] == _tool_call_key(tool_name, tool_args):
+            result = await prefetch["task"]
+            if result is not None:
+                prefetch["used"] = True
+                PREFETCHES.inc(result="used")
+                return result
+        return await asyncio.to_thread(_call_tool, tool_name, tool_args)
+
+    return list(await asyncio.gather(*(run(name, args) for name, args in calls)))
+
+
+def _requested_tool_calls(action_obj: ActionObject) -> list[ToolCall]:
+    """
+    Distinct tool calls requested by the decision, capped at MAX_PARALLEL_TOOL_CALLS.
+    """
+    calls: list[ToolCall] = []
+    for entry in action_obj.get("tool_calls") or []:
+        if isinstance(entry, dict) and entry.get("tool_name") in TOOL_NAMES:
+            args = entry.get("tool_args")
+            calls.append((entry["tool_name"], args if isinstance(args, dict) else {}))
+    if not calls and action_obj.get("tool_name"):
+        calls.append((action_obj["tool_name"], action_obj.get("tool_args") or {}))
+
+    seen: set[tuple[Any, ...]] = set()
+    distinct: list[ToolCall] = []
+    for name, args in calls:
+        key = _tool_call_key(name, args)
+        if key not in seen:
+            seen.add(key)
+            distinct.append((name, args))
+    return distinct[: max(1, get_settings()["max_parallel_tool_calls"])]
+
+
+def _build_answer_messages(
     last_user_message: ChatMessage,
     tool_name: str,
     tool_result: dict[str, Any],
-) -> str:
-    """
-    Use the LLM to turn a tool result into a concise, user-facing answer.
-    """
-    system = {
-        "role": "system",
-        "content": (
-            "You are Bookly's formal and concise support agent. "
-            "Given the user's question and the structured tool result, "
-            "write a short, professional answer. Do not mention internal tools."
-        ),
-    }
+) -> list[dict[str, Any]]:
     user = {
         "role": "user",
         "content": (
             f"User question: {last_user_message.content}\n\n"
             f"Tool used: {tool_name}\n"
-            f"Structured tool result (JSON): {json.dumps(tool_result, ensure_ascii=False)}\n\n"
+            f"Structured tool result (JSON): {serialization.dumps(tool_result)}\n\n"
             "Write a concise response to the user summarizing the relevant details."
         ),
     }
-    return chat_completion([system, user], temperature=0.2)
+    return [_ANSWER_SYSTEM_MESSAGE, user]
 
 
-def agent_turn(messages: list[ChatMessage]) -> tuple[ChatMessage, ActionMetadata]:
+async def _build_answer_from_tool(
+    last_user_message: ChatMessage,
+    tool_name: str,
+    tool_result: dict[str, Any],
+) -> str:
     """
-    Full agent turn implementation that:
-    - Asks clarifying questions when required.
-    - Calls tools backed by synthetic Bookly data when appropriate.
-    - Produces a formal, concise assistant message and structured metadata.
+    Use the LLM to turn a tool result into a concise, user-facing answer.
     """
-    action_obj = _decide_next_action(messages)
-    action = action_obj.get("action", "answer")
-    last_user_message = messages[-1]
+    with span("answer", tool=tool_name) as answer_span:
+        cache = get_answer_cache()
+        key = answer_cache_key(tool_name, tool_result, last_user_message.content)
+        cached = await cache.get(key)
+        answer_span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            return cached
+
+        answer_messages = _build_answer_messages(last_user_message, tool_name, tool_result)
+        answer = await chat_completion(answer_messages, temperature=0.2, stage="answer")
+        await cache.set(key, answer)
+        return answer
+
+
+async def _stream_answer_from_tool(
+    last_user_message: ChatMessage,
+    tool_name: str,
+    tool_result: dict[str, Any],
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of _build_answer_from_tool yielding answer tokens as they arrive.
+    """
+    cache = get_answer_cache()
+    key = answer_cache_key(tool_name, tool_result, last_user_message.content)
+    cached = await cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    answer_messages = _build_answer_messages(last_user_message, tool_name, tool_result)
+    chunks: list[str] = []
+    async for delta in chat_completion_stream(
+        answer_messages, temperature=0.2, stage="answer"
+    ):
+        chunks.append(delta)
+        yield delta
+    await cache.set(key, "".join(chunks))
+
+
+async def _plan_turn(
+    messages: list[ChatMessage],
+    conversation_id: str | None = None,
+) -> TurnPlan:
+    """
+    Decide the next action and run any tool, stopping short of phrasing a tool answer.
+
+    The returned plan carries the final text for clarifications, direct answers and
+    templated tool results, or the tool result that still has to be turned into a
+    user-facing answer.
+    """
+    settings = get_settings()
+    fast_path = settings["fast_path_enabled"]
+    text = messages[-1].content
+    if fast_path:
+        topic = route_policy_question(text)
+        if topic is not None:
+            return await _plan_tool_calls(
+                [("get_policy_answer", {"topic": topic})], text, fast_path
+            )
+
+    state_id = conversation_id if settings["conversation_state_enabled"] else None
+    known_details = None
+    if state_id is not None:
+        state, latest_added = observe_messages(state_id, messages)
+        # Only a message that added details can complete a pending request;
+        # anything else ("thanks") still goes to the model.
+        call = state_tool_call(state) if latest_added else None
+        if call is not None:
+            STATE_SHORTCUTS.inc()
+            return await _plan_tool_calls([call], text, fast_path, state_id=state_id)
+        known_details = state_summary(state)
+
+    prefetch = _start_prefetch(text) if settings["speculative_prefetch_enabled"] else None
+    try:
+        action_obj = await _decide_next_action(messages, conversation_id, known_details)
+        action = action_obj.get("action", "answer")
+        if action == "call_tool":
+            calls = _requested_tool_calls(action_obj)
+            if calls:
+                return await _plan_tool_calls(
+                    calls, text, fast_path, prefetch, state_id=state_id
+                )
+    finally:
+        if prefetch is not None and not prefetch["used"]:
+            # Unused, including when the turn failed: stop waiting for it.
+            prefetch["task"].cancel()
+            PREFETCHES.inc(result="wasted")
 
     if action == "ask_clarification":
         question = action_obj.get("clarifying_question") or (
             "Could you please provide a bit more detail so I can help you accurately?"
         )
-        assistant_message = ChatMessage(role="assistant", content=question)
         metadata = ActionMetadata(
             action="ask_clarification",
             tool_name=None,
             tool_args=None,
             is_clarifying_question=True,
         )
-        return assistant_message, metadata
+        return {"metadata": metadata, "text": question}
 
     if action == "answer":
         answer_text = action_obj.get("answer_text") or (
             "Here is the information I can provide based on your request."
         )
-        assistant_message = ChatMessage(role="assistant", content=answer_text)
         metadata = ActionMetadata(
             action="answer",
             tool_name=None,
             tool_args=None,
             is_clarifying_question=False,
         )
-        return assistant_message, metadata
-
-    # action == "call_tool"
-    tool_name = action_obj.get("tool_name")
-    tool_args = action_obj.get("tool_args") or {}
-    if not tool_name:
-        # Fallback: treat as clarification request if the model forgot to set tool_name.
-        assistant_message = ChatMessage(
-            role="assistant",
-            content=(
-                "I need a bit more information before I can look up your request. "
-                "Could you clarify the order id or email associated with your account?"
-            ),
-        )
+        return {"metadata": metadata, "text": answer_text}
+
+    # action == "call_tool" without a usable tool: ask the customer instead.
+    metadata = ActionMetadata(
+        action="ask_clarification",
+        tool_name=None,
+        tool_args=None,
+        is_clarifying_question=True,
+    )
+    return {
+        "metadata": metadata,
+        "text": (
+            "I need a bit more information before I can look up your request. "
+            "Could you clarify the order id or email associated with your account?"
+        ),
+    }
+
+
+async def _plan_tool_calls(
+    calls: list[ToolCall],
+    text: str,
+    fast_path: bool,
+    prefetch: _Prefetch | None = None,
+    state_id: str | None = None,
+) -> TurnPlan:
+    """
+    Run the requested tool calls plus the follow-ups their results imply.
+
+    A single call keeps its own tool name and result, so templates and the answer
+    cache see the same shape as before; several calls are combined into one
+    result for the answer step. With a `state_id`, the calls' arguments are
+    recorded in that conversation's state.
+    """
+    results = await _run_tool_calls(calls, prefetch)
+    executed = [(name, args, result) for (name, args), result in zip(calls, results)]
+
+    seen = {_tool_call_key(name, args) for name, args in calls}
+    follow_ups: list[ToolCall] = []
+    for name, args, result in executed:
+        for call in follow_up_calls(text, name, args, result):
+            key = _tool_call_key(*call)
+            if key not in seen:
+                seen.add(key)
+                follow_ups.append(call)
+    if follow_ups:
+        results = await _run_tool_calls(follow_ups)
+        executed += [(name, args, result) for (name, args), result in zip(follow_ups, results)]
+    if state_id is not None:
+        record_tool_calls(state_id, executed)
+
+    first_name, first_args, first_result = executed[0]
+    if len(executed) == 1:
         metadata = ActionMetadata(
-            action="ask_clarification",
-            tool_name=None,
-            tool_args=None,
-            is_clarifying_question=True,
+            action="call_tool",
+            tool_name=first_name,
+            tool_args=first_args,
+            is_clarifying_question=False,
         )
-        return assistant_message, metadata
-
-    tool_result = _call_tool(tool_name, tool_args)
-    final_text = _build_answer_from_tool(last_user_message, tool_name, tool_result)
+        plan: TurnPlan = {
+            "metadata": metadata,
+            "tool_name": first_name,
+            "tool_result": first_result,
+        }
+        if fast_path:
+            rendered = render_tool_result(first_name, first_result)
+            if rendered is not None:
+                plan["text"] = rendered
+        return plan
 
-    assistant_message = ChatMessage(role="assistant", content=final_text)
     metadata = ActionMetadata(
         action="call_tool",
-        tool_name=tool_name,
-        tool_args=tool_args,
+        tool_name=first_name,
+        tool_args=first_args,
+        tool_calls=[{"tool_name": name, "tool_args": args} for name, args, _ in executed],
+        is_clarifying_question=False,
+    )
+    return {
+        "metadata": metadata,
+        "tool_name": ", ".join(name for name, _, _ in executed),
+        "tool_result": {
+            "results": [
+                {"tool_name": name, "tool_args": args, "result": result}
+                for name, args, result in executed
+            ]
+        },
+    }
+
+
+def _degraded_metadata() -> ActionMetadata:
+    return ActionMetadata(
+        action="answer",
+        tool_name=None,
+        tool_args=None,
         is_clarifying_question=False,
+        degraded=True,
     )
+
+
+async def agent_turn(
+    messages: list[ChatMessage],
+    conversation_id: str | None = None,
+) -> tuple[ChatMessage, ActionMetadata]:
+    """
+    Full agent turn implementation that:
+    - Asks clarifying questions when required.
+    - Calls tools backed by synthetic Bookly data when appropriate.
+    - Produces a formal, concise assistant message and structured metadata.
+
+    While the LLM provider is unavailable, returns DEGRADED_REPLY immediately,
+    flagged with `degraded` in the metadata. Turns that need no LLM call
+    (fast-path policy answers, templated results) are still answered normally.
+    """
+    try:
+        with span("turn") as turn_span:
+            plan = await _plan_turn(messages, conversation_id)
+            metadata = plan["metadata"]
+            turn_span.set_attribute("action", metadata.action)
+            turn_span.set_attribute("tool_name", metadata.tool_name)
+            if "text" in plan:
+                final_text = plan["text"]
+            else:
+                final_text = await _build_answer_from_tool(
+                    messages[-1], plan["tool_name"], plan["tool_result"]
+                )
+    except LLMUnavailableError as exc:
+        logger.warning("LLM unavailable, serving the degraded reply: %s", exc)
+        TURNS.inc(action="degraded")
+        return ChatMessage(role="assistant", content=DEGRADED_REPLY), _degraded_metadata()
+
+    TURNS.inc(action=metadata.action)
+    assistant_message = ChatMessage(role="assistant", content=final_text)
     return assistant_message, metadata
 
 
+async def agent_turn_stream(
+    messages: list[ChatMessage],
+    conversation_id: str | None = None,
+) -> AsyncIterator[TurnEvent]:
+    """
+    Streaming agent turn yielding events in order:
+    - ("metadata", ActionMetadata) as soon as the next action is decided.
+    - ("token", str) for each chunk of the assistant reply.
+    - ("message", ChatMessage) with the complete assistant reply.
+
+    When the provider fails while the answer stream is being opened, the reply
+    is DEGRADED_REPLY and the metadata already yielded is marked `degraded`.
+    """
+    start = time.perf_counter()
+    try:
+        with span("plan"):
+            plan = await _plan_turn(messages, conversation_id)
+    except LLMUnavailableError as exc:
+        logger.warning("LLM unavailable, serving the degraded reply: %s", exc)
+        TURNS.inc(action="degraded")
+        yield "metadata", _degraded_metadata()
+        yield "token", DEGRADED_REPLY
+        yield "message", ChatMessage(role="assistant", content=DEGRADED_REPLY)
+        return
+    yield "metadata", plan["metadata"]
+
+    if "text" in plan:
+        final_text = plan["text"]
+        yield "token", final_text
+    else:
+        chunks: list[str] = []
+        try:
+            async for delta in _stream_answer_from_tool(
+                messages[-1], plan["tool_name"], plan["tool_result"]
+            ):
+                chunks.append(delta)
+                yield "token", delta
+        except LLMUnavailableError as exc:
+            # Only raised before the first token, while the stream is being opened.
+            logger.warning("LLM unavailable, serving the degraded reply: %s", exc)
+            plan["metadata"].degraded = True
+            chunks = [DEGRADED_REPLY]
+            yield "token", DEGRADED_REPLY
+        final_text = "".join(chunks)
+
+    # Measured by hand: a span cannot stay open across the generator's yields.
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="turn_stream")
+    metadata = plan["metadata"]
+    TURNS.inc(action="degraded" if metadata.degraded else metadata.action)
+    yield "message", ChatMessage(role="assistant", content=final_text)
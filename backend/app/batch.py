@@ -0,0 +1,202 @@
+"""
+Run a JSONL file of ChatRequests through the agent and write ChatResponses as JSONL.
+
+    python -m app.batch requests.jsonl --output responses.jsonl --concurrency 8 --rpm 300
+
+Output lines are written in input order, one per request, as {"index", "response"}
+or {"index", "error"}. Batch turns keep no conversation state or history summary,
+so replaying a file twice takes the same paths. The output file is the
+checkpoint: rerunning the same command skips the requests already answered and
+appends the rest. When the LLM provider is unavailable the job stops with an
+{"index", "error", "retry": true} line, which a rerun replaces.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from functools import partial
+from typing import Any, TypedDict
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from . import serialization
+from .config import get_settings
+from .ratelimit import get_rate_limiter, provider_name
+from .schemas import ChatRequest, ChatResponse
+
+
+logger = logging.getLogger(__name__)
+
+ChatHandler = Callable[[ChatRequest], Awaitable[ChatResponse]]
+
+
+class BatchLine(TypedDict, total=False):
+    index: int
+    response: dict[str, Any]
+    error: str
+    # Set when the request failed only because the LLM provider was unavailable.
+    retry: bool
+
+
+UNAVAILABLE_ERROR = "The LLM provider is unavailable; retry this request later."
+
+
+async def _process(index: int, raw: str, handler: ChatHandler) -> BatchLine:
+    try:
+        request = ChatRequest.model_validate_json(raw)
+    except ValidationError as exc:
+        return {"index": index, "error": f"Invalid ChatRequest: {exc.errors()[0]['msg']}"}
+    try:
+        response = await handler(request)
+    except HTTPException as exc:
+        return {"index": index, "error": str(exc.detail)}
+    except Exception:
+        logger.exception("Batch request %d failed.", index)
+        return {"index": index, "error": "The assistant could not complete this request."}
+    if response.action_metadata.degraded:
+        return {"index": index, "error": UNAVAILABLE_ERROR, "retry": True}
+    return {"index": index, "response": response.model_dump()}
+
+
+async def run_batch(
+    lines: Iterable[str],
+    handler: ChatHandler,
+    concurrency: int | None = None,
+    requests_per_minute: float | None = None,
+    offset: int = 0,
+) -> AsyncIterator[BatchLine]:
+    """
+    Answer each non-blank JSONL line with `handler`, yielding results in input order.
+
+    At most `concurrency` requests run at once, and turns are started no faster
+    than `requests_per_minute` for the configured provider (0 disables the limit).
+    The first `offset` requests are skipped, so a job resumes from the number of
+    results it already has. The first result marked `retry` (an LLM outage) is
+    the last one yielded; resuming from its index retries it.
+    """
+    settings = get_settings()
+    concurrency = max(1, concurrency or settings["batch_concurrency"])
+    if requests_per_minute is None:
+        requests_per_minute = settings["batch_requests_per_minute"]
+    limiter = (
+        get_rate_limiter(provider_name(), "batch_requests", requests_per_minute)
+        if requests_per_minute > 0
+        else None
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def start(index: int, raw: str) -> BatchLine:
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            return await _process(index, raw, handler)
+
+    # Results are emitted in order; finished requests behind a slow one wait in
+    # this window, which bounds memory to a few multiples of the concurrency.
+    window: deque[asyncio.Task[BatchLine]] = deque()
+    records = (raw for raw in lines if raw.strip())
+    try:
+        for index, raw in enumerate(records):
+            if index < offset:
+                continue
+            window.append(asyncio.create_task(start(index, raw)))
+            if len(window) >= concurrency * 4:
+                result = await window.popleft()
+                yield result
+                if result.get("retry"):
+                    return
+        while window:
+            result = await window.popleft()
+            yield result
+            if result.get("retry"):
+                return
+    finally:
+        for task in window:
+            task.cancel()
+
+
+def _completed_results(path: str) -> int:
+    """
+    Count complete result lines in an existing output file, truncating a partial
+    last line left by an interrupted run and any line marked for retry.
+    """
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            try:
+                line = serialization.loads(raw)
+            except ValueError:
+                break
+            if not raw.endswith(b"\n") or line.get("retry"):
+                break
+            count += 1
+            valid_bytes += len(raw)
+    if valid_bytes != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return count
+
+
+async def _run_file(args: argparse.Namespace) -> tuple[int, int, int, bool]:
+    from .llm_client import close_client
+    from .main import run_chat_turn
+
+    offset = _completed_results(args.output)
+    answered = failed = 0
+    interrupted = False
+    try:
+        with open(args.input, encoding="utf-8") as source, open(
+            args.output, "a", encoding="utf-8"
+        ) as sink:
+            async for result in run_batch(
+                source,
+                partial(run_chat_turn, conversation_caches=False),
+                args.concurrency,
+                args.rpm,
+                offset,
+            ):
+                sink.write(serialization.dumps(result) + "\n")
+                # Each flushed line is a checkpoint; a rerun resumes after it.
+                sink.flush()
+                if result.get("retry"):
+                    interrupted = True
+                elif "error" in result:
+                    failed += 1
+                else:
+                    answered += 1
+    finally:
+        await close_client()
+    return offset, answered, failed, interrupted
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file with one ChatRequest per line.")
+    parser.add_argument("--output", required=True, help="JSONL file for results.")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--rpm", type=float, default=None, help="Turns started per minute.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    skipped, answered, failed, interrupted = asyncio.run(_run_file(args))
+    print(
+        f"skipped {skipped} already answered, answered {answered}, failed {failed}",
+        file=sys.stderr,
+    )
+    if interrupted:
+        print("stopped: the LLM provider is unavailable; rerun to resume.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import date, datetime, time as day_time, timedelta
+from functools import lru_cache
+from typing import Any, Generic, Protocol, TypeVar
+
+from . import serialization
+from .config import get_settings
+from .telemetry import ANSWER_CACHE, TOOL_RESULT_CACHE
+
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+R = TypeVar("R")
+
+
+class TTLCache(Generic[V]):
+    """
+    Thread-safe in-memory cache with LRU eviction and a per-entry time to live.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class AnswerCacheBackend(Protocol):
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str) -> None: ...
+
+
+class MemoryAnswerBackend:
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self._cache: TTLCache[str] = TTLCache(maxsize, ttl_seconds)
+
+    async def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+
+class RedisAnswerBackend:
+    """
+    Redis-compatible backend shared by all workers.
+
+    Entries expire via TTL; LRU eviction is left to the server's maxmemory-policy.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "bookly:answer:") -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError(
+                "ANSWER_CACHE_REDIS_URL is set but the 'redis' package is not installed."
+            ) from exc
+
+        self._client = redis_asyncio.Redis.from_url(url, decode_responses=True)
+        self._ttl_ms = max(1, int(ttl_seconds * 1000))
+        self._prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        return await self._client.get(self._prefix + key)
+
+    async def set(self, key: str, value: str) -> None:
+        await self._client.set(self._prefix + key, value, px=self._ttl_ms)
+
+
+class AnswerCache:
+    """
+    Cache of final answers keyed by tool name, tool result and user question.
+    """
+
+    def __init__(self, backend: AnswerCacheBackend | None) -> None:
+        self._backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._backend is not None
+
+    async def get(self, key: str) -> str | None:
+        if self._backend is None:
+            return None
+        try:
+            value = await self._backend.get(key)
+        except Exception:
+            # A cache outage should cost an LLM call, not fail the turn.
+            logger.warning("Answer cache lookup failed.", exc_info=True)
+            value = None
+        if value is None:
+            self.misses += 1
+            ANSWER_CACHE.inc(result="miss")
+        else:
+            self.hits += 1
+            ANSWER_CACHE.inc(result="hit")
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        if self._backend is None or not value:
+            return
+        try:
+            await self._backend.set(key, value)
+        except Exception:
+            logger.warning("Answer cache store failed.", exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_NON_WORD = re.compile(r"[^\w@.+-]+")
+
+
+def _normalize_question(text: str) -> str:
+    # Case, punctuation and spacing do not change what the user asked.
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def answer_cache_key(tool_name: str, tool_result: dict[str, Any], question: str) -> str:
+    """
+    Canonical hash of a tool answer request.
+    """
+    payload = serialization.dumps_bytes(
+        [tool_name, tool_result, _normalize_question(question)], sort_keys=True
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache:
+    """
+    Return the process-wide answer cache configured from settings.
+    """
+    settings = get_settings()
+    if settings["answer_cache_redis_url"]:
+        return AnswerCache(
+            RedisAnswerBackend(
+                settings["answer_cache_redis_url"], settings["answer_cache_ttl_seconds"]
+            )
+        )
+    if settings["answer_cache_size"] <= 0:
+        return AnswerCache(None)
+    return AnswerCache(
+        MemoryAnswerBackend(
+            settings["answer_cache_size"], settings["answer_cache_ttl_seconds"]
+        )
+    )
+
+
+class ToolResultCache:
+    """
+    Per-process memo of tool results, keyed by tool name and normalized arguments.
+
+    Each entry records the store version stamp it was computed under and the day
+    it was computed on; it is served only while both still match, so a changed
+    order is never answered from the cache and nothing outlives midnight. Cached
+    results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.enabled = maxsize > 0
+        self._cache: TTLCache[tuple[int, int, Any]] = TTLCache(maxsize, ttl_seconds)
+        # (today's ordinal, timestamp of the next local midnight)
+        self._day: tuple[int, float] = (0, 0.0)
+
+    def _today(self) -> int:
+        today, day_ends = self._day
+        if time.time() >= day_ends:
+            current = date.today()
+            next_midnight = datetime.combine(current + timedelta(days=1), day_time())
+            today = current.toordinal()
+            self._day = (today, next_midnight.timestamp())
+        return today
+
+    def memoize(
+        self,
+        tool_name: str,
+        args: tuple[str, ...],
+        version: Callable[[], int],
+        compute: Callable[[], R],
+    ) -> R:
+        """
+        Return the cached result for `args`, or compute and cache it.
+
+        The stamp is read before computing, so a write that lands meanwhile
+        leaves the entry already stale.
+        """
+        if not self.enabled:
+            return compute()
+        key = "\x1f".join((tool_name, *args))
+        today = self._today()
+        stamp = version()
+        entry = self._cache.get(key)
+        if entry is not None:
+            day, entry_stamp, result = entry
+            if day == today and entry_stamp == stamp:
+                TOOL_RESULT_CACHE.inc(result="hit")
+                return result
+            TOOL_RESULT_CACHE.inc(result="stale")
+        else:
+            TOOL_RESULT_CACHE.inc(result="miss")
+        result = compute()
+        self._cache.set(key, (today, stamp, result))
+        return result
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+@lru_cache(maxsize=1)
+def get_tool_result_cache() -> ToolResultCache:
+    """
+    Return the process-wide tool result cache configured from settings.
+    """
+    settings = get_settings()
+    # The in-memory store already keeps serialized orders on its records and
+    # answers faster than a cache lookup; only the sqlite store gains from it.
+    size = settings["tool_result_cache_size"]
+    if settings["order_store_backend"] != "sqlite":
+        size = 0
+    return ToolResultCache(size, settings["tool_result_cache_ttl_seconds"])
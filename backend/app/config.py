@@ -20,6 +20,88 @@ def get_settings() -> dict:
     return {
         "openai_api_key": _get_env("OPENAI_API_KEY"),
         "openai_model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "openai_small_model": os.getenv("OPENAI_SMALL_MODEL", ""),
+        "small_model_stages": tuple(
+            stage.strip()
+            for stage in os.getenv("SMALL_MODEL_STAGES", "decision,answer,summary").split(",")
+            if stage.strip()
+        ),
+        "decision_min_confidence": float(os.getenv("DECISION_MIN_CONFIDENCE", "0.5")),
+        "llm_prices": os.getenv("LLM_PRICES", ""),
+        "openai_base_url": os.getenv("OPENAI_BASE_URL", ""),
         "openai_timeout_seconds": float(os.getenv("OPENAI_TIMEOUT_SECONDS", "20")),
+        "openai_max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "200")),
+        "openai_max_keepalive_connections": int(
+            os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "50")
+        ),
+        "openai_keepalive_expiry_seconds": float(
+            os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30")
+        ),
+        "openai_warm_connections": int(os.getenv("OPENAI_WARM_CONNECTIONS", "0")),
+        "llm_requests_per_minute": float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        "llm_tokens_per_minute": float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+        "llm_max_retries": int(os.getenv("LLM_MAX_RETRIES", "3")),
+        "llm_backoff_base_seconds": float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5")),
+        "llm_backoff_max_seconds": float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8")),
+        "llm_single_flight_enabled": os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower()
+        in {"1", "true", "yes"},
+        "circuit_breaker_failures": int(os.getenv("CIRCUIT_BREAKER_FAILURES", "5")),
+        "circuit_breaker_reset_seconds": float(
+            os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30")
+        ),
+        "order_store_backend": os.getenv("ORDER_STORE_BACKEND", "memory").lower(),
+        "order_store_path": os.getenv("ORDER_STORE_PATH", "bookly.db"),
+        "order_store_pool_size": int(os.getenv("ORDER_STORE_POOL_SIZE", "4")),
+        "policy_index_path": os.getenv("POLICY_INDEX_PATH", ""),
+        "policy_docs_dir": os.getenv("POLICY_DOCS_DIR", ""),
+        "policy_reload_seconds": float(os.getenv("POLICY_RELOAD_SECONDS", "30")),
+        "policy_min_score": float(os.getenv("POLICY_MIN_SCORE", "2.0")),
+        "policy_min_margin": float(os.getenv("POLICY_MIN_MARGIN", "1.5")),
+        "fast_path_enabled": os.getenv("FAST_PATH_ENABLED", "true").lower()
+        in {"1", "true", "yes"},
+        "answer_cache_size": int(os.getenv("ANSWER_CACHE_SIZE", "1024")),
+        "answer_cache_ttl_seconds": float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "300")),
+        "answer_cache_redis_url": os.getenv("ANSWER_CACHE_REDIS_URL", ""),
+        "tool_result_cache_size": int(os.getenv("TOOL_RESULT_CACHE_SIZE", "4096")),
+        "tool_result_cache_ttl_seconds": float(
+            os.getenv("TOOL_RESULT_CACHE_TTL_SECONDS", "3600")
+        ),
+        "history_max_turns": int(os.getenv("HISTORY_MAX_TURNS", "6")),
+        "history_max_tokens": int(os.getenv("HISTORY_MAX_TOKENS", "2000")),
+        "history_summary_enabled": os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower()
+        in {"1", "true", "yes"},
+        "history_summary_ttl_seconds": float(
+            os.getenv("HISTORY_SUMMARY_TTL_SECONDS", "3600")
+        ),
+        "conversation_state_enabled": os.getenv("CONVERSATION_STATE_ENABLED", "true").lower()
+        in {"1", "true", "yes"},
+        "conversation_state_size": int(os.getenv("CONVERSATION_STATE_SIZE", "10000")),
+        "conversation_state_ttl_seconds": float(
+            os.getenv("CONVERSATION_STATE_TTL_SECONDS", "3600")
+        ),
+        "conversation_state_history_turns": int(
+            os.getenv("CONVERSATION_STATE_HISTORY_TURNS", "2")
+        ),
+        "session_store_backend": os.getenv("SESSION_STORE_BACKEND", "none").lower(),
+        "session_store_path": os.getenv("SESSION_STORE_PATH", "bookly_sessions.db"),
+        "session_store_size": int(os.getenv("SESSION_STORE_SIZE", "10000")),
+        "session_ttl_seconds": float(os.getenv("SESSION_TTL_SECONDS", "86400")),
+        "conversation_id_secret": os.getenv("CONVERSATION_ID_SECRET", ""),
+        "decision_mode": os.getenv("DECISION_MODE", "json").lower(),
+        "max_parallel_tool_calls": int(os.getenv("MAX_PARALLEL_TOOL_CALLS", "4")),
+        "speculative_prefetch_enabled": os.getenv(
+            "SPECULATIVE_PREFETCH_ENABLED", "true"
+        ).lower()
+        in {"1", "true", "yes"},
+        "admission_max_concurrency": int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64")),
+        "admission_max_queue": int(os.getenv("ADMISSION_MAX_QUEUE", "128")),
+        "admission_queue_timeout_seconds": float(
+            os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5")
+        ),
+        "admission_per_key_concurrency": int(os.getenv("ADMISSION_PER_KEY_CONCURRENCY", "16")),
+        "admission_api_key_header": os.getenv("ADMISSION_API_KEY_HEADER", "X-API-Key"),
+        "batch_concurrency": int(os.getenv("BATCH_CONCURRENCY", "8")),
+        "batch_requests_per_minute": float(os.getenv("BATCH_REQUESTS_PER_MINUTE", "0")),
+        "tracing_exporter": os.getenv("TRACING_EXPORTER", "none").lower(),
+        "json_backend": os.getenv("JSON_BACKEND", "auto").lower(),
     }
-
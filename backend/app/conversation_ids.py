@@ -0,0 +1,47 @@
+"""
+Conversation ids issued by the server.
+
+Per-conversation server state is only keyed on ids the server handed out, so
+clients that send a shared or made-up id (a hard-coded "web-session", say) never
+share it with each other. An issued id carries an HMAC tag, so every worker
+holding the same CONVERSATION_ID_SECRET can tell it from a client-chosen one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import uuid
+from functools import lru_cache
+
+from .config import get_settings
+
+
+@lru_cache(maxsize=1)
+def conversation_id_secret() -> bytes:
+    """
+    CONVERSATION_ID_SECRET, or a random per-process secret when it is unset.
+    """
+    configured = get_settings()["conversation_id_secret"]
+    return configured.encode("utf-8") if configured else secrets.token_bytes(32)
+
+
+def _tag(token: str) -> str:
+    digest = hmac.new(conversation_id_secret(), token.encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+
+def issue_conversation_id() -> str:
+    token = uuid.uuid4().hex
+    return f"{token}.{_tag(token)}"
+
+
+def is_issued(conversation_id: str | None) -> bool:
+    """
+    Whether `conversation_id` was handed out by issue_conversation_id().
+    """
+    if not conversation_id:
+        return False
+    token, _, tag = conversation_id.rpartition(".")
+    return bool(token) and hmac.compare_digest(tag, _tag(token))
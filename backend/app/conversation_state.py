@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, TypedDict
+
+from .cache import TTLCache
+from .config import get_settings
+from .history import messages_digest
+from .router import extract_entities
+from .schemas import ChatMessage
+from .tools.orders import ORDER_NOT_FOUND_REASON
+
+
+class ConversationState(TypedDict, total=False):
+    """
+    Order details gathered so far in one conversation.
+
+    `intent` is the request still waiting for its tool call ("refund" or
+    "status"); `seen` is the number of messages already folded in and `digest`
+    their messages_digest().
+    """
+
+    order_id: str
+    email: str
+    last_name: str
+    reason: str
+    intent: str
+    seen: int
+    digest: str
+
+
+# The tool that completes each intent.
+_INTENT_TOOLS: dict[str, str] = {
+    "refund": "evaluate_refund_eligibility",
+    "status": "lookup_order",
+}
+
+
+@lru_cache(maxsize=1)
+def _state_cache() -> TTLCache[ConversationState]:
+    settings = get_settings()
+    return TTLCache(
+        settings["conversation_state_size"], settings["conversation_state_ttl_seconds"]
+    )
+
+
+def observe_messages(
+    conversation_id: str, messages: list[ChatMessage]
+) -> tuple[ConversationState, bool]:
+    """
+    Fold the user messages not seen yet into the conversation's state.
+
+    Returns the state and whether the latest message added any detail. A history
+    that does not extend the one already folded in (rewritten, truncated, or
+    another client's under the same id) starts from a fresh state.
+    """
+    cache = _state_cache()
+    state: ConversationState = dict(cache.get(conversation_id) or {})  # type: ignore[assignment]
+    seen = state.get("seen", 0)
+    if seen > len(messages) or state.get("digest") != messages_digest(messages[:seen]):
+        state = {}
+
+    latest_added = False
+    for index in range(state.get("seen", 0), len(messages)):
+        message = messages[index]
+        if message.role != "user":
+            continue
+        entities = extract_entities(message.content)
+        state.update(entities)  # type: ignore[typeddict-item]
+        latest_added = index == len(messages) - 1 and bool(entities)
+
+    state["seen"] = len(messages)
+    state["digest"] = messages_digest(messages)
+    cache.set(conversation_id, state)
+    return state, latest_added
+
+
+def record_tool_calls(
+    conversation_id: str, executed: list[tuple[str, dict[str, Any], dict[str, Any]]]
+) -> None:
+    """
+    Merge the arguments of executed tool calls into the state.
+
+    Arguments of a lookup that found nothing are dropped so they are asked for
+    again, and an intent is cleared once its tool has run.
+    """
+    cache = _state_cache()
+    state: ConversationState = dict(cache.get(conversation_id) or {})  # type: ignore[assignment]
+    for tool_name, args, result in executed:
+        failed = result.get("found") is False or result.get("reason") == ORDER_NOT_FOUND_REASON
+        if "order_id" in args:
+            if failed:
+                state.pop("order_id", None)
+            else:
+                state["order_id"] = str(args["order_id"])
+        identity = str(args.get("email_or_last_name") or args.get("email") or "").strip()
+        if identity and not (failed and tool_name == "lookup_order"):
+            state["email" if "@" in identity else "last_name"] = identity
+        if args.get("reason"):
+            state["reason"] = str(args["reason"])
+        if _INTENT_TOOLS.get(state.get("intent", "")) == tool_name:
+            del state["intent"]
+    cache.set(conversation_id, state)
+
+
+def state_tool_call(state: ConversationState) -> tuple[str, dict[str, Any]] | None:
+    """
+    The tool call the pending intent needs, once all its arguments are known.
+    """
+    intent = state.get("intent")
+    order_id = state.get("order_id")
+    if not order_id:
+        return None
+    if intent == "refund" and state.get("reason"):
+        return "evaluate_refund_eligibility", {"order_id": order_id, "reason": state["reason"]}
+    identity = state.get("email") or state.get("last_name")
+    if intent == "status" and identity:
+        return "lookup_order", {"order_id": order_id, "email_or_last_name": identity}
+    return None
+
+
+def state_summary(state: ConversationState) -> str | None:
+    """
+    One-line summary of the known details, or None when nothing is known yet.
+    """
+    parts = [
+        f"{label} {state[key]}"  # type: ignore[literal-required]
+        for key, label in (
+            ("order_id", "order id"),
+            ("email", "email"),
+            ("last_name", "last name"),
+        )
+        if state.get(key)
+    ]
+    if state.get("reason"):
+        parts.append(f"refund reason: {state['reason']!r}")
+    if not parts:
+        return None
+    return "; ".join(parts)
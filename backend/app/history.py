@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Callable, TypedDict
+
+from .cache import TTLCache
+from .config import get_settings
+from .llm_client import chat_completion
+from .schemas import ChatMessage
+
+
+logger = logging.getLogger(__name__)
+
+# Extra turns tolerated past HISTORY_MAX_TURNS before the summary is rolled
+# forward, so a long thread costs one summarization call every few turns rather
+# than on every turn.
+_SUMMARY_SLACK_TURNS = 2
+_SUMMARY_CACHE_SIZE = 10_000
+# Rough per-message overhead of the chat format (role markers, separators).
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_SUMMARY_SYSTEM_MESSAGE: dict[str, str] = {
+    "role": "system",
+    "content": (
+        "You maintain a running summary of a Bookly customer support conversation. "
+        "Merge the existing summary with the new messages into one short factual "
+        "summary of at most 120 words. Keep every order id, email address, customer "
+        "name, refund reason, tool outcome and unresolved question. Do not add "
+        "anything that was not said."
+    ),
+}
+
+
+class ConversationSummary(TypedDict):
+    count: int
+    digest: str
+    text: str
+
+
+@lru_cache(maxsize=1)
+def _token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+    except ImportError:
+        # Without tiktoken, ~4 characters per token is close enough for budgeting.
+        return lambda text: len(text) // 4 + 1
+
+    try:
+        encoding = tiktoken.encoding_for_model(get_settings()["openai_model"])
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens locally, using tiktoken when it is installed.
+    """
+    return _token_counter()(text)
+
+
+def count_message_tokens(messages: list[ChatMessage]) -> int:
+    return sum(count_tokens(m.content) + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _window_start(messages: list[ChatMessage], max_turns: int, max_tokens: int) -> int:
+    """
+    Index of the first message kept verbatim.
+
+    Whole turns (a user message and the replies after it) are kept from the end
+    until either limit is reached; the latest turn is always kept.
+    """
+    start = len(messages)
+    turns = 0
+    tokens = 0
+    for idx in range(len(messages) - 1, -1, -1):
+        tokens += count_tokens(messages[idx].content) + _MESSAGE_OVERHEAD_TOKENS
+        if messages[idx].role == "user" or idx == 0:
+            turns += 1
+            if start < len(messages) and (turns > max_turns or tokens > max_tokens):
+                break
+            start = idx
+    return start
+
+
+def recent_turns(messages: list[ChatMessage], max_turns: int) -> list[ChatMessage]:
+    """
+    The last `max_turns` turns within HISTORY_MAX_TOKENS; older turns are dropped
+    without a summary.
+    """
+    return messages[_window_start(messages, max_turns, get_settings()["history_max_tokens"]) :]
+
+
+def messages_digest(messages: list[ChatMessage]) -> str:
+    """
+    Digest of a message list, to tell an extended history from a rewritten one.
+    """
+    h = hashlib.sha256()
+    for m in messages:
+        h.update(m.role.encode("utf-8"))
+        h.update(b"\0")
+        h.update(m.content.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _summary_cache() -> TTLCache[ConversationSummary]:
+    return TTLCache(_SUMMARY_CACHE_SIZE, get_settings()["history_summary_ttl_seconds"])
+
+
+async def _summarize(previous: str | None, messages: list[ChatMessage]) -> str:
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+    user: dict[str, Any] = {
+        "role": "user",
+        "content": (
+            f"Existing summary: {previous or '(none)'}\n\n"
+            f"New messages:\n{transcript}\n\n"
+            "Return only the updated summary."
+        ),
+    }
+    summary = await chat_completion(
+        [_SUMMARY_SYSTEM_MESSAGE, user], temperature=0.0, stage="summary"
+    )
+    return summary.strip()
+
+
+async def window_history(
+    messages: list[ChatMessage],
+    conversation_id: str | None = None,
+) -> tuple[str | None, list[ChatMessage]]:
+    """
+    Bound the conversation sent to the decision step.
+
+    Returns an optional summary of older turns and the recent messages to send
+    verbatim. Summaries are cached per conversation_id and rolled forward
+    incrementally; without a conversation_id older turns are simply dropped.
+    """
+    settings = get_settings()
+    max_turns = settings["history_max_turns"]
+    max_tokens = settings["history_max_tokens"]
+
+    boundary = _window_start(messages, max_turns, max_tokens)
+    if boundary == 0:
+        return None, messages
+    if not conversation_id or not settings["history_summary_enabled"]:
+        return None, messages[boundary:]
+
+    cache = _summary_cache()
+    cached = cache.get(conversation_id)
+    if cached is not None and (
+        cached["count"] > boundary or cached["digest"] != messages_digest(messages[: cached["count"]])
+    ):
+        # The client rewrote or truncated its history; start over.
+        cached = None
+
+    if cached is not None:
+        tail = messages[cached["count"] :]
+        if _window_start(tail, max_turns + _SUMMARY_SLACK_TURNS, max_tokens) == 0:
+            return cached["text"], tail
+
+    previous_text = cached["text"] if cached else None
+    already_summarized = cached["count"] if cached else 0
+    try:
+        text = await _summarize(previous_text, messages[already_summarized:boundary])
+    except Exception:
+        logger.warning("History summarization failed; truncating instead.", exc_info=True)
+        return previous_text, messages[boundary:]
+
+    cache.set(
+        conversation_id,
+        {"count": boundary, "digest": messages_digest(messages[:boundary]), "text": text},
+    )
+    return text, messages[boundary:]
@@ -1,19 +1,84 @@
-from collections.abc import Sequence
-from typing import Any
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, TypeVar
 
-from openai import OpenAI
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
+from . import serialization
 from .config import get_settings
+from .ratelimit import get_circuit_breaker, get_rate_limiter, provider_name
+from .telemetry import (
+    CIRCUIT_OPEN,
+    LLM_CALLS,
+    LLM_COST,
+    LLM_RATE_LIMIT_SECONDS,
+    LLM_RETRIES,
+    LLM_SECONDS,
+    LLM_TOKENS,
+    SINGLE_FLIGHT,
+    span,
+)
 
 
-def _build_client() -> OpenAI:
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Completion tokens assumed per call when charging the tokens-per-minute budget
+# up front; the real count is only known after the response.
+_COMPLETION_TOKEN_ALLOWANCE = 256
+
+# USD per million (prompt, cached prompt, completion) tokens; LLM_PRICES adds to
+# or overrides these.
+_DEFAULT_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+
+class LLMUnavailableError(Exception):
+    """
+    The provider cannot serve the call: the circuit is open or retries ran out.
+    """
+
+
+def _build_client() -> AsyncOpenAI:
     settings = get_settings()
-    return OpenAI(api_key=settings["openai_api_key"])
+    # One pooled HTTP client per process: keep-alive connections are reused across
+    # concurrent conversations instead of paying a TLS handshake per LLM call.
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings["openai_max_connections"],
+            max_keepalive_connections=settings["openai_max_keepalive_connections"],
+            keepalive_expiry=settings["openai_keepalive_expiry_seconds"],
+        ),
+        timeout=httpx.Timeout(settings["openai_timeout_seconds"]),
+    )
+    return AsyncOpenAI(
+        api_key=settings["openai_api_key"],
+        base_url=settings["openai_base_url"] or None,
+        http_client=http_client,
+        # Retries, backoff and the circuit breaker are handled in _call_provider.
+        max_retries=0,
+    )
 
 
-def get_client() -> OpenAI:
+def get_client() -> AsyncOpenAI:
     """
-    Lazily construct and reuse a single OpenAI client instance.
+    Lazily construct and reuse a single AsyncOpenAI client instance.
     """
     # Simple module-level singleton is sufficient here; no need for classes.
     global _CLIENT  # type: ignore[assignment]
@@ -26,24 +91,430 @@ def get_client() -> OpenAI:
     return client
 
 
-def chat_completion(
+async def close_client() -> None:
+    """
+    Close the shared client and its connection pool, if it was ever created.
+    """
+    global _CLIENT  # type: ignore[assignment]
+
+    try:
+        client = _CLIENT  # type: ignore[name-defined]
+    except NameError:
+        return
+    del _CLIENT
+    await client.close()
+
+
+async def warm_connections(count: int) -> int:
+    """
+    Open up to `count` keep-alive connections to the provider before traffic arrives.
+
+    Each connection is opened with a cheap model-list request. Any HTTP response,
+    even an error status, leaves a pooled connection behind. Returns how many
+    requests reached the provider.
+    """
+    if count <= 0:
+        return 0
+    client = get_client()
+    timeout = get_settings()["openai_timeout_seconds"]
+
+    async def touch() -> bool:
+        try:
+            await client.models.list(timeout=timeout)
+        except openai.APIStatusError:
+            return True
+        except openai.APIError as exc:
+            logger.warning("Connection warm-up failed: %s", exc)
+            return False
+        return True
+
+    return sum(await asyncio.gather(*(touch() for _ in range(count))))
+
+
+@dataclass(slots=True)
+class CallTally:
+    calls: int = 0
+    cost_usd: float = 0.0
+
+
+# Per-request LLM call tally; a mutable object so calls made from child tasks of
+# the request are counted as well.
+_CALL_COUNTER: ContextVar[CallTally | None] = ContextVar("llm_call_counter", default=None)
+
+
+@contextmanager
+def count_llm_calls() -> Iterator[CallTally]:
+    """
+    Tally the LLM calls made inside the block and their estimated cost.
+    """
+    tally = CallTally()
+    token = _CALL_COUNTER.set(tally)
+    try:
+        yield tally
+    finally:
+        _CALL_COUNTER.reset(token)
+
+
+def _count_call(stage: str) -> None:
+    LLM_CALLS.inc(stage=stage)
+    tally = _CALL_COUNTER.get()
+    if tally is not None:
+        tally.calls += 1
+
+
+def model_for_stage(stage: str) -> str:
+    """
+    Model serving `stage`: OPENAI_SMALL_MODEL for SMALL_MODEL_STAGES, else OPENAI_MODEL.
+    """
+    settings = get_settings()
+    if settings["openai_small_model"] and stage in settings["small_model_stages"]:
+        return settings["openai_small_model"]
+    return settings["openai_model"]
+
+
+@lru_cache(maxsize=1)
+def _prices() -> dict[str, tuple[float, float, float]]:
+    """
+    Token prices by model, from the built-in table and LLM_PRICES.
+
+    LLM_PRICES is a comma-separated list of `model=prompt/cached/completion` USD
+    per million tokens; the cached price may be left out.
+    """
+    prices = dict(_DEFAULT_PRICES)
+    for entry in get_settings()["llm_prices"].split(","):
+        if not entry.strip():
+            continue
+        model, _, spec = entry.partition("=")
+        parts = [float(p) for p in spec.split("/")]
+        if len(parts) == 2:
+            parts.insert(1, parts[0])
+        if len(parts) != 3:
+            raise ValueError(f"Invalid LLM_PRICES entry: {entry!r}")
+        prices[model.strip()] = (parts[0], parts[1], parts[2])
+    return prices
+
+
+def _cost_usd(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    # Dated snapshots such as gpt-4o-2024-08-06 are priced as their base model.
+    prices = _prices()
+    price = prices.get(model) or next(
+        (prices[m] for m in sorted(prices, key=len, reverse=True) if model.startswith(m + "-")),
+        None,
+    )
+    if price is None:
+        return 0.0
+    prompt, cached, completion = price
+    return (
+        (prompt_tokens - cached_tokens) * prompt
+        + cached_tokens * cached
+        + completion_tokens * completion
+    ) / 1_000_000
+
+
+def _record_usage(usage: Any, stage: str, model: str, current_span: Any = None) -> None:
+    """
+    Record token usage and estimated cost, including prompt tokens served from the
+    provider's cache.
+    """
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+    prompt_tokens = usage.prompt_tokens or 0
+    completion_tokens = usage.completion_tokens or 0
+    cost = _cost_usd(model, prompt_tokens, cached_tokens, completion_tokens)
+
+    LLM_TOKENS.inc(prompt_tokens, kind="prompt", stage=stage)
+    LLM_TOKENS.inc(cached_tokens, kind="cached", stage=stage)
+    LLM_TOKENS.inc(completion_tokens, kind="completion", stage=stage)
+    LLM_COST.inc(cost, stage=stage, model=model)
+    tally = _CALL_COUNTER.get()
+    if tally is not None:
+        tally.cost_usd += cost
+    if current_span is not None:
+        current_span.set_attribute("prompt_tokens", prompt_tokens)
+        current_span.set_attribute("cached_tokens", cached_tokens)
+        current_span.set_attribute("completion_tokens", completion_tokens)
+        current_span.set_attribute("cost_usd", cost)
+    logger.debug(
+        "LLM usage: model=%s prompt_tokens=%d cached_tokens=%d completion_tokens=%d",
+        model,
+        prompt_tokens,
+        cached_tokens,
+        completion_tokens,
+    )
+
+
+def _retry_reason(exc: Exception) -> str | None:
+    """
+    Why a failed call is worth retrying, or None when it is not.
+    """
+    if isinstance(exc, openai.APIConnectionError):
+        return "connection"
+    if isinstance(exc, openai.APIStatusError):
+        if exc.status_code == 429:
+            return "rate_limited"
+        if exc.status_code >= 500:
+            return "server_error"
+    return None
+
+
+def _backoff_seconds(attempt: int, exc: Exception) -> float:
+    """
+    Full-jitter exponential backoff, stretched to the provider's Retry-After.
+    """
+    settings = get_settings()
+    ceiling = settings["llm_backoff_max_seconds"]
+    delay = random.uniform(0, min(ceiling, settings["llm_backoff_base_seconds"] * 2**attempt))
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        delay = max(delay, float(retry_after)) if retry_after else delay
+    except ValueError:
+        pass
+    return min(ceiling, delay)
+
+
+async def _throttle(provider: str, messages: Sequence[dict[str, Any]]) -> None:
+    """
+    Wait for the client-side RPM/TPM budget sized to the provider quota.
+    """
+    settings = get_settings()
+    rpm = settings["llm_requests_per_minute"]
+    tpm = settings["llm_tokens_per_minute"]
+    if rpm <= 0 and tpm <= 0:
+        return
+    waited = 0.0
+    if rpm > 0:
+        waited += await get_rate_limiter(provider, "requests", rpm).acquire()
+    if tpm > 0:
+        estimate = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        waited += await get_rate_limiter(provider, "tokens", tpm).acquire(
+            estimate + _COMPLETION_TOKEN_ALLOWANCE
+        )
+    LLM_RATE_LIMIT_SECONDS.observe(waited)
+
+
+async def _call_provider(
+    stage: str,
+    messages: Sequence[dict[str, Any]],
+    create: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Run one provider request under the rate limiter, retry policy and circuit breaker.
+
+    429s, 5xx responses and connection errors are retried with jittered exponential
+    backoff. Once retries run out the failure counts against the circuit breaker,
+    and an open circuit fails calls immediately with LLMUnavailableError.
+    """
+    settings = get_settings()
+    provider = provider_name()
+    breaker = get_circuit_breaker(provider)
+    if not breaker.allow():
+        raise LLMUnavailableError(f"Circuit breaker for {provider} is open.")
+    # Counted once admitted, so calls refused by an open circuit are not tallied.
+    _count_call(stage)
+
+    attempt = 0
+    while True:
+        await _throttle(provider, messages)
+        try:
+            result = await create()
+        except openai.APIError as exc:
+            reason = _retry_reason(exc)
+            if reason is None:
+                # The provider answered; only this request was rejected.
+                breaker.record_success()
+                CIRCUIT_OPEN.set(0)
+                raise
+            if attempt >= settings["llm_max_retries"]:
+                breaker.record_failure()
+                CIRCUIT_OPEN.set(1 if breaker.is_open else 0)
+                raise LLMUnavailableError(
+                    f"{provider} failed after {attempt + 1} attempts."
+                ) from exc
+            LLM_RETRIES.inc(stage=stage, reason=reason)
+            await asyncio.sleep(_backoff_seconds(attempt, exc))
+            attempt += 1
+            continue
+        breaker.record_success()
+        CIRCUIT_OPEN.set(0)
+        return result
+
+
+# Upstream requests currently in flight, keyed by _request_key.
+_IN_FLIGHT: dict[str, asyncio.Task[Any]] = {}
+
+
+def _request_key(
+    model: str,
+    temperature: float,
+    messages: Sequence[dict[str, Any]],
+    **extra: Any,
+) -> str:
+    payload = {"model": model, "temperature": temperature, "messages": list(messages), **extra}
+    return hashlib.sha256(serialization.dumps_bytes(payload, sort_keys=True)).hexdigest()
+
+
+def _forget(key: str, task: asyncio.Task[Any]) -> None:
+    if _IN_FLIGHT.get(key) is task:
+        del _IN_FLIGHT[key]
+    if not task.cancelled():
+        # Mark the exception as retrieved even if every caller has gone away.
+        task.exception()
+
+
+async def _single_flight(key: str, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Share one upstream request between concurrent identical calls.
+
+    The first caller starts `call` as a task; callers with the same key that
+    arrive before it finishes await that task instead of sending their own
+    request. The shared task is shielded, so a caller that is cancelled (for
+    example a disconnected client) does not cancel it for the others.
+    """
+    if not get_settings()["llm_single_flight_enabled"]:
+        return await call()
+
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(call())
+        _IN_FLIGHT[key] = task
+        task.add_done_callback(lambda done: _forget(key, done))
+    else:
+        SINGLE_FLIGHT.inc()
+    return await asyncio.shield(task)
+
+
+async def chat_completion(
     messages: Sequence[dict[str, Any]],
     temperature: float = 0.1,
+    stage: str = "default",
+    model: str | None = None,
 ) -> str:
     """
-    Call OpenAI chat completion with the configured model and return the assistant content.
+    Call OpenAI chat completion and return the assistant content.
+
+    `stage` labels the call in metrics and traces (decision, answer, summary, ...)
+    and picks the model via model_for_stage unless `model` is given. Concurrent
+    identical calls share one upstream request.
     """
     settings = get_settings()
     client = get_client()
+    model = model or model_for_stage(stage)
 
-    response = client.chat.completions.create(
-        model=settings["openai_model"],
-        messages=list(messages),
-        temperature=temperature,
-        timeout=settings["openai_timeout_seconds"],
-    )
+    async def call() -> str:
+        start = time.perf_counter()
+        with span(f"llm.{stage}", model=model) as current_span:
+            response = await _call_provider(
+                stage,
+                messages,
+                lambda: client.chat.completions.create(
+                    model=model,
+                    messages=list(messages),
+                    temperature=temperature,
+                    timeout=settings["openai_timeout_seconds"],
+                ),
+            )
+            _record_usage(response.usage, stage, model, current_span)
+        LLM_SECONDS.observe(time.perf_counter() - start, stage=stage, model=model)
+
+        choice = response.choices[0]
+        content = choice.message.content or ""
+        return content
+
+    key = _request_key(model, temperature, messages)
+    return await _single_flight(key, call)
+
+
+async def chat_completion_tool_calls(
+    messages: Sequence[dict[str, Any]],
+    tools: Sequence[dict[str, Any]],
+    temperature: float = 0.1,
+    stage: str = "decision",
+    model: str | None = None,
+) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Call OpenAI chat completion in function-calling mode, requiring a tool call.
+
+    Returns the assistant content and the (function name, raw JSON arguments) of
+    each tool call, in order. Concurrent identical calls share one upstream request.
+    """
+    settings = get_settings()
+    client = get_client()
+    model = model or model_for_stage(stage)
+
+    async def call() -> tuple[str, list[tuple[str, str]]]:
+        start = time.perf_counter()
+        with span(f"llm.{stage}", model=model) as current_span:
+            response = await _call_provider(
+                stage,
+                messages,
+                lambda: client.chat.completions.create(
+                    model=model,
+                    messages=list(messages),
+                    temperature=temperature,
+                    timeout=settings["openai_timeout_seconds"],
+                    tools=list(tools),
+                    tool_choice="required",
+                ),
+            )
+            _record_usage(response.usage, stage, model, current_span)
+        LLM_SECONDS.observe(time.perf_counter() - start, stage=stage, model=model)
+
+        message = response.choices[0].message
+        calls = [
+            (call.function.name, call.function.arguments)
+            for call in message.tool_calls or []
+            if call.type == "function"
+        ]
+        return message.content or "", calls
+
+    key = _request_key(model, temperature, messages, tools=list(tools))
+    content, calls = await _single_flight(key, call)
+    # Callers sharing a response each get their own list.
+    return content, list(calls)
+
+
+async def chat_completion_stream(
+    messages: Sequence[dict[str, Any]],
+    temperature: float = 0.1,
+    stage: str = "answer",
+    model: str | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream an OpenAI chat completion, yielding content deltas as they arrive.
+
+    Streams are not shared between callers; each opens its own request.
+    """
+    settings = get_settings()
+    client = get_client()
+    model = model or model_for_stage(stage)
+    start = time.perf_counter()
 
-    choice = response.choices[0]
-    content = choice.message.content or ""
-    return content
+    # Only the request is wrapped in a span: a span must not stay open across the
+    # generator's yields, which resume in the consumer's context.
+    with span(f"llm.{stage}", model=model):
+        # Retried only until the stream opens; a failure mid-stream is not replayed.
+        stream = await _call_provider(
+            stage,
+            messages,
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=list(messages),
+                temperature=temperature,
+                timeout=settings["openai_timeout_seconds"],
+                stream=True,
+                stream_options={"include_usage": True},
+            ),
+        )
 
+    async for chunk in stream:
+        if chunk.usage is not None:
+            _record_usage(chunk.usage, stage, model)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+    LLM_SECONDS.observe(time.perf_counter() - start, stage=stage, model=model)
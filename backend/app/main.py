@@ -1,11 +1,63 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from .admission import AdmissionRejected, Ticket, get_admission_controller
+from .agent import agent_turn, agent_turn_stream
+from .batch import run_batch
+from .config import get_settings
+from .conversation_ids import conversation_id_secret, is_issued, issue_conversation_id
+from .llm_client import close_client, count_llm_calls, get_client, warm_connections
+from .schemas import ActionMetadata, ChatMessage, ChatRequest, ChatResponse
+from .serialization import ORJSONResponse, dumps
+from .sessions import get_session_store
+from .telemetry import REQUEST_SECONDS, render_metrics, span
+from .tools.retrieval import get_policy_index
+from .tools.store import get_order_store
+
 
-from .agent import agent_turn
-from .schemas import ChatRequest, ChatResponse
+logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="Bookly Support Agent API")
+def preload() -> None:
+    """
+    Load process-wide state: settings, order data, the policy index and the LLM client.
+
+    The launcher calls this before forking workers, so they share these pages
+    copy-on-write. Under plain uvicorn it runs at startup. No connections are
+    opened here, so nothing socket-bound crosses the fork.
+    """
+    get_settings()
+    # Workers forked from one launcher accept each other's conversation ids.
+    conversation_id_secret()
+    get_order_store()
+    get_policy_index()
+    get_client()
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI) -> AsyncIterator[None]:
+    preload()
+    warm = get_settings()["openai_warm_connections"]
+    if warm:
+        opened = await warm_connections(warm)
+        logger.info("Warmed %d of %d LLM connections.", opened, warm)
+    application.state.ready = True
+    yield
+    application.state.ready = False
+    await close_client()
+
+
+app = FastAPI(title="Bookly Support Agent API", lifespan=lifespan)
+app.state.ready = False
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,27 +68,199 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def observe_request_duration(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template rather than raw path to keep cardinality bounded.
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - start, path=getattr(route, "path", "unmatched")
+    )
+    return response
+
+
 @app.get("/health")
-def health() -> dict[str, str]:
-    return {"status": "ok"}
+def health() -> dict[str, Any]:
+    """
+    Liveness: the process is up. `ready` mirrors /health/ready.
+    """
+    return {"status": "ok", "ready": app.state.ready}
+
+
+@app.get("/health/ready")
+def health_ready(response: Response) -> dict[str, str]:
+    """
+    Readiness: 503 until data is loaded and the connection pool is warmed.
+    """
+    if not app.state.ready:
+        response.status_code = 503
+        return {"status": "starting"}
+    return {"status": "ready"}
 
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
-    if not request.messages:
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Prometheus scrape endpoint.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+async def _prepare_turn(request: ChatRequest) -> tuple[str, list[ChatMessage]]:
+    """
+    Resolve the conversation id and full message history for this turn.
+
+    A request either carries the whole history in `messages`, or only the new
+    `message`, in which case the history is rebuilt from the session store.
+    """
+    with span("validate"):
+        return await _resolve_turn(request)
+
+
+async def _resolve_turn(request: ChatRequest) -> tuple[str, list[ChatMessage]]:
+    store = get_session_store()
+
+    if request.message is not None:
+        if request.messages:
+            raise HTTPException(
+                status_code=400,
+                detail="Send either the full messages list or a single message, not both.",
+            )
+        if store is None or not request.conversation_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Sending a single message requires a conversation_id and a "
+                "server-side session store.",
+            )
+        history = (
+            await store.load(request.conversation_id)
+            if is_issued(request.conversation_id)
+            else None
+        )
+        if history is None:
+            # Answering from an empty history would silently drop the context.
+            raise HTTPException(
+                status_code=404,
+                detail="Unknown or expired conversation_id; resend the full messages list.",
+            )
+        messages = history + [request.message]
+    else:
+        messages = request.messages
+
+    if not messages:
         raise HTTPException(status_code=400, detail="At least one message is required.")
 
-    last_message = request.messages[-1]
+    last_message = messages[-1]
     if last_message.role != "user":
         raise HTTPException(
             status_code=400,
             detail="Last message in the conversation must be from the user.",
         )
 
-    assistant_message, metadata = agent_turn(request.messages)
+    return request.conversation_id or issue_conversation_id(), messages
+
+
+def _state_key(conversation_id: str | None) -> str | None:
+    """
+    The key for per-conversation server state, or None for ids the client chose.
+
+    Clients may share an id (a hard-coded "web-session", say), so only
+    server-issued ids key history summaries, conversation state or sessions.
+    """
+    return conversation_id if is_issued(conversation_id) else None
+
+
+async def _record_turn(
+    request: ChatRequest,
+    conversation_id: str,
+    messages: list[ChatMessage],
+    assistant_message: ChatMessage,
+    metadata: ActionMetadata,
+) -> None:
+    store = get_session_store()
+    # An outage reply is not part of the conversation: storing it would replay
+    # it to the model as a real answer on later turns.
+    if store is None or metadata.degraded or _state_key(conversation_id) is None:
+        return
+    if request.message is not None:
+        await store.append(conversation_id, [request.message, assistant_message])
+    else:
+        await store.replace(conversation_id, messages + [assistant_message])
+
+
+def _api_key(http_request: Request) -> str:
+    return http_request.headers.get(get_settings()["admission_api_key_header"], "")
+
 
-    conversation_id = request.conversation_id or "local-session"
+async def _acquire(api_key: str, request: ChatRequest) -> Ticket | None:
+    controller = get_admission_controller()
+    if controller is None:
+        return None
+    # A shared client-chosen id would otherwise queue unrelated users behind one lock.
+    return await controller.acquire(api_key, _state_key(request.conversation_id))
 
+
+async def _admit(http_request: Request, request: ChatRequest) -> Ticket | None:
+    """
+    Take an admission slot for this turn, or refuse it with 429 and Retry-After.
+
+    Turns are queued per API key (the ADMISSION_API_KEY_HEADER header) and
+    serialized per server-issued conversation_id.
+    """
+    try:
+        return await _acquire(_api_key(http_request), request)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=429,
+            detail="The assistant is busy right now; please retry shortly.",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from None
+
+
+def _release(ticket: Ticket | None) -> None:
+    controller = get_admission_controller()
+    if ticket is not None and controller is not None:
+        controller.release(ticket)
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that returns its admission slot however the response ends,
+    including when the client disconnects before the body iterator starts.
+    """
+
+    def __init__(self, *args: Any, ticket: Ticket | None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._ticket = ticket
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _release(self._ticket)
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+async def run_chat_turn(
+    request: ChatRequest, conversation_caches: bool = True
+) -> ChatResponse:
+    """
+    Answer one ChatRequest end to end, including the session store round trip.
+
+    Batch replays pass `conversation_caches=False`: no conversation state or
+    cached history summary then carries over between runs, so replaying the
+    same requests takes the same path.
+    """
+    conversation_id, messages = await _prepare_turn(request)
+    state_key = _state_key(conversation_id) if conversation_caches else None
+    assistant_message, metadata = await agent_turn(messages, state_key)
+    await _record_turn(request, conversation_id, messages, assistant_message, metadata)
     return ChatResponse(
         conversation_id=conversation_id,
         message=assistant_message,
@@ -44,9 +268,119 @@ def chat(request: ChatRequest) -> ChatResponse:
     )
 
 
+@app.post("/chat", response_model=ChatResponse, response_class=ORJSONResponse)
+async def chat(request: ChatRequest, http_request: Request) -> ORJSONResponse:
+    ticket = await _admit(http_request, request)
+    try:
+        with count_llm_calls() as tally:
+            result = await run_chat_turn(request)
+    finally:
+        _release(ticket)
+    # The response is built here rather than by FastAPI, which would validate
+    # and encode the ChatResponse a second time.
+    return ORJSONResponse(
+        result.model_dump(),
+        # Lets load tests attribute LLM round trips and spend to each turn.
+        headers={"X-LLM-Calls": str(tally.calls), "X-LLM-Cost-USD": f"{tally.cost_usd:.8f}"},
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(
+    request: Request,
+    offset: int = Query(default=0, ge=0, description="Requests to skip when resuming."),
+    concurrency: int | None = Query(default=None, ge=1, le=64),
+) -> StreamingResponse:
+    """
+    Answer a JSONL body of ChatRequests, streaming one JSONL result per request.
+
+    Results arrive in input order as {"index", "response"} or {"index", "error"},
+    so the number of lines received is the offset to resume an interrupted job.
+    Each turn is admitted like a /chat turn, under the caller's API key. During
+    an LLM outage the stream ends with an {"index", "error", "retry": true} line;
+    resume with that index as the offset.
+    """
+    body = (await request.body()).decode("utf-8")
+    api_key = _api_key(request)
+
+    async def admitted_turn(chat_request: ChatRequest) -> ChatResponse:
+        # Batch turns share the worker's slots and the key's quota with /chat,
+        # but a shed batch turn backs off and retries instead of failing.
+        while True:
+            try:
+                ticket = await _acquire(api_key, chat_request)
+                break
+            except AdmissionRejected as exc:
+                await asyncio.sleep(exc.retry_after)
+        try:
+            return await run_chat_turn(chat_request, conversation_caches=False)
+        finally:
+            _release(ticket)
+
+    async def results() -> AsyncIterator[str]:
+        async for line in run_batch(
+            body.splitlines(), admitted_turn, concurrency=concurrency, offset=offset
+        ):
+            yield dumps(line) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    """
+    Server-Sent Events variant of /chat.
+
+    Emits a `metadata` event once the action is decided, `token` events for each
+    chunk of the reply, and a final `done` event carrying the full ChatResponse.
+    The admission slot is held until the response ends.
+    """
+    ticket = await _admit(http_request, request)
+    try:
+        conversation_id, messages = await _prepare_turn(request)
+    except BaseException:
+        _release(ticket)
+        raise
+
+    async def events() -> AsyncIterator[str]:
+        metadata: ActionMetadata | None = None
+        try:
+            async for event, payload in agent_turn_stream(
+                messages, _state_key(conversation_id)
+            ):
+                if event == "metadata":
+                    metadata = payload  # type: ignore[assignment]
+                    yield _sse("metadata", metadata.model_dump())
+                elif event == "token":
+                    yield _sse("token", {"delta": payload})
+                elif event == "message" and metadata is not None:
+                    message: ChatMessage = payload  # type: ignore[assignment]
+                    await _record_turn(request, conversation_id, messages, message, metadata)
+                    response = ChatResponse(
+                        conversation_id=conversation_id,
+                        message=message,
+                        action_metadata=metadata,
+                    )
+                    yield _sse("done", response.model_dump())
+        except Exception:
+            # Headers are already sent, so report the failure in-band.
+            logger.exception("Streaming chat turn failed.")
+            yield _sse("error", {"detail": "The assistant could not complete this turn."})
+        finally:
+            # Free the slot as soon as the reply is done; the response releases
+            # it too when the iterator never runs to completion.
+            _release(ticket)
+
+    return _AdmittedStreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        ticket=ticket,
+    )
+
+
 def create_app() -> FastAPI:
     """
     Factory for creating the FastAPI app (useful for testing).
     """
     return app
-
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from urllib.parse import urlparse
+
+from .config import get_settings
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, bursting up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Wait until `tokens` are available and take them; returns the seconds waited.
+
+        Requests larger than the capacity are clamped to it, so they wait for a
+        full bucket instead of forever.
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        # The lock keeps waiters first-come, first-served.
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= tokens
+        return waited
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls are
+    refused for `reset_seconds`; then a single probe is let through, and its
+    outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.reset_seconds:
+            return False
+        # Let this call through as the probe and hold everyone else off for
+        # another period; a probe that never reports back cannot wedge the circuit.
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+_LIMITERS: dict[tuple[str, str, float], TokenBucket] = {}
+_BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def provider_name() -> str:
+    """
+    Name of the configured LLM provider, used to key per-provider limits.
+    """
+    base_url = get_settings()["openai_base_url"]
+    return (urlparse(base_url).hostname if base_url else None) or "api.openai.com"
+
+
+def get_rate_limiter(provider: str, kind: str, per_minute: float) -> TokenBucket:
+    """
+    Shared per-process limiter allowing `per_minute` units of `kind` for `provider`.
+
+    The bucket holds one minute of quota at most, as provider quotas do.
+    """
+    key = (provider, kind, per_minute)
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = TokenBucket(rate=per_minute / 60.0, capacity=per_minute)
+        _LIMITERS[key] = limiter
+    return limiter
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """
+    Shared per-process circuit breaker for `provider`.
+    """
+    breaker = _BREAKERS.get(provider)
+    if breaker is None:
+        settings = get_settings()
+        breaker = CircuitBreaker(
+            settings["circuit_breaker_failures"], settings["circuit_breaker_reset_seconds"]
+        )
+        _BREAKERS[provider] = breaker
+    return breaker
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from .tools.orders import ORDER_NOT_FOUND_REASON
+from .tools.policies import PolicyAnswer
+
+
+# Patterns are deliberately narrow: a miss only costs the usual LLM round trip,
+# while a false positive would answer the wrong question.
+_POLICY_PATTERNS: dict[str, tuple[re.Pattern[str], ...]] = {
+    "shipping": (
+        re.compile(r"\bshipping (time|times|policy|options)\b"),
+        re.compile(r"\bhow (long|fast|quickly)\b.*\b(ship|shipping|deliver|delivery|arrive)\b"),
+        re.compile(r"\b(do|can) you ship (internationally|abroad|overseas|to)\b"),
+        re.compile(r"\binternational (shipping|delivery)\b"),
+    ),
+    "returns": (
+        re.compile(r"\breturns? (policy|window|period)\b"),
+        re.compile(r"\bhow (do|can) i return\b"),
+        re.compile(r"\bcan (i|you) return (a|an|books?|items?|e-?books?)\b"),
+    ),
+    "refunds": (
+        re.compile(r"\brefund (policy|process|processing|timeline)\b"),
+        re.compile(r"\bhow long\b.*\brefunds?\b.*\b(take|process|processed)\b"),
+    ),
+    "password_reset": (
+        re.compile(r"\b(reset|forgot|forgotten|change|recover)( my)? password\b"),
+        re.compile(r"\bpassword reset\b"),
+    ),
+}
+
+# Anything that points at a specific order or account needs the full agent.
+_ORDER_SPECIFIC = re.compile(
+    r"\b[a-z]{1,3}-?\d{3,}\b"
+    r"|[\w.+-]+@[\w-]+\.[\w.-]+"
+    r"|\bmy (last |recent |latest )?(order|orders|book|books|package|parcel|purchase)\b"
+    r"|\border (number|id|#)"
+)
+
+
+_ORDER_ID = re.compile(r"\b[a-z]{1,3}-?\d{3,}\b", re.IGNORECASE)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_LAST_ORDER = re.compile(
+    r"\b(last|latest|most recent|newest) (order|purchase|book|package|parcel)\b"
+)
+# A bare "return" is too common ("I'll return to this later", "return address")
+# to start a refund check, so only returning something counts.
+_REFUND_INTENT = re.compile(
+    r"\b(refunds?|refundable|returnable|money back"
+    r"|return (?:it|this|that|them|these|those|the|my|an?))\b"
+)
+_STATUS_INTENT = re.compile(
+    r"\b(where|status|shipped|arrive|arriving|delivered|track|tracking)\b"
+)
+_LAST_NAME = re.compile(r"\b(?:last name|surname) is ([a-z][a-z'-]+)", re.IGNORECASE)
+
+
+def route_policy_question(text: str) -> str | None:
+    """
+    Return the policy topic for a high-confidence general policy question, or None.
+
+    Only messages matching exactly one topic and carrying no order-specific
+    details are routed, so ambiguous questions still go through the LLM.
+    """
+    normalized = " ".join(text.lower().split())
+    if _ORDER_SPECIFIC.search(normalized):
+        return None
+
+    topics = [
+        topic
+        for topic, patterns in _POLICY_PATTERNS.items()
+        if any(p.search(normalized) for p in patterns)
+    ]
+    if len(topics) != 1:
+        return None
+    return topics[0]
+
+
+def extract_order_reference(text: str) -> tuple[str, str] | None:
+    """
+    Return the (order id, email) pair when a message carries both, or None.
+    """
+    order_id = _ORDER_ID.search(text)
+    email = _EMAIL.search(text)
+    if order_id is None or email is None:
+        return None
+    return order_id.group(0), email.group(0)
+
+
+def extract_entities(text: str) -> dict[str, str]:
+    """
+    Order details stated in one user message.
+
+    Keys are order_id, email, last_name and intent ("refund" or "status"); a
+    refund intent also records the message as the refund reason.
+    """
+    entities: dict[str, str] = {}
+    email = _EMAIL.search(text)
+    if email is not None:
+        entities["email"] = email.group(0)
+    # Order ids are only looked for outside email addresses.
+    order_id = _ORDER_ID.search(_EMAIL.sub(" ", text))
+    if order_id is not None:
+        entities["order_id"] = order_id.group(0)
+    last_name = _LAST_NAME.search(text)
+    if last_name is not None:
+        entities["last_name"] = last_name.group(1)
+
+    normalized = " ".join(text.lower().split())
+    # Refund requests often mention delivery too, so a refund intent wins.
+    if _REFUND_INTENT.search(normalized):
+        entities["intent"] = "refund"
+        entities["reason"] = text
+    elif _STATUS_INTENT.search(normalized):
+        entities["intent"] = "status"
+    return entities
+
+
+def follow_up_calls(
+    text: str,
+    tool_name: str,
+    tool_args: dict[str, Any],
+    tool_result: dict[str, Any],
+) -> list[tuple[str, dict[str, Any]]]:
+    """
+    Tool calls implied by a result, so multi-step questions finish in one turn.
+
+    "Is my last order refundable?" is decided as list_recent_orders; once the
+    newest order is known, its refund check (or status lookup) follows without
+    another decision round trip.
+    """
+    if tool_name != "list_recent_orders" or not tool_result.get("orders"):
+        return []
+    normalized = " ".join(text.lower().split())
+    if not _LAST_ORDER.search(normalized):
+        return []
+
+    latest_id = tool_result["orders"][0]["id"]
+    if _REFUND_INTENT.search(normalized):
+        return [("evaluate_refund_eligibility", {"order_id": latest_id, "reason": text})]
+    if _STATUS_INTENT.search(normalized):
+        email = str(tool_args.get("email", ""))
+        return [("lookup_order", {"order_id": latest_id, "email_or_last_name": email})]
+    return []
+
+
+def _render_policy(policy: PolicyAnswer | None) -> str:
+    if policy is None:
+        return (
+            "I'm sorry, I do not have policy information on that topic. "
+            "I can help with shipping, returns, refunds, and password resets."
+        )
+    return f"{policy['summary']} {policy['details']}"
+
+
+def render_tool_result(tool_name: str, tool_result: dict[str, Any]) -> str | None:
+    """
+    Render tool results that need no phrasing from the LLM, or return None.
+
+    Covers static policy entries and negative outcomes such as an order that
+    could not be found; everything else is left to the answer step.
+    """
+    if tool_name == "get_policy_answer":
+        return _render_policy(tool_result.get("policy"))
+
+    if tool_name == "lookup_order" and not tool_result.get("found"):
+        return (
+            f"I'm sorry, I could not locate that order. {tool_result.get('reason', '')} "
+            "Please double-check the order id and the email address or last name "
+            "used for the order."
+        )
+
+    if (
+        tool_name in {"list_recent_orders", "evaluate_refund_eligibility_for_customer"}
+        and not tool_result.get("orders")
+    ):
+        return (
+            "I could not find any orders associated with that email address. "
+            "Please confirm the email used for your Bookly account, or share an "
+            "order id so I can look it up directly."
+        )
+
+    if (
+        tool_name == "evaluate_refund_eligibility"
+        and not tool_result.get("eligible")
+        and tool_result.get("reason") == ORDER_NOT_FOUND_REASON
+    ):
+        return (
+            "I'm sorry, I could not find an order with that order id. "
+            "Please double-check the id so I can review its refund eligibility."
+        )
+
+    return None
@@ -11,10 +11,24 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     conversation_id: Optional[str] = Field(
         default=None,
-        description="Opaque client conversation identifier (optional, not persisted).",
+        description=(
+            "Conversation identifier returned by a previous response. Ids the server "
+            "did not issue are echoed back but key no server-side state."
+        ),
     )
     messages: list[ChatMessage] = Field(
-        ..., description="Ordered list of prior messages including the latest user message."
+        default_factory=list,
+        description=(
+            "Ordered list of prior messages including the latest user message. "
+            "Omit it and send `message` to continue a stored conversation."
+        ),
+    )
+    message: Optional[ChatMessage] = Field(
+        default=None,
+        description=(
+            "Only the new user message, appended to the history stored under a "
+            "server-issued conversation_id (requires the session store)."
+        ),
     )
 
 
@@ -28,15 +42,32 @@ class ActionMetadata(BaseModel):
     tool_args: Optional[dict[str, Any]] = Field(
         default=None, description="Arguments passed to the tool, if any."
     )
+    tool_calls: Optional[list[dict[str, Any]]] = Field(
+        default=None,
+        description=(
+            "Every tool call made this turn as {tool_name, tool_args}, when there was "
+            "more than one; tool_name and tool_args then describe the first."
+        ),
+    )
     is_clarifying_question: bool = Field(
         default=False,
         description="Whether the assistant message is primarily a clarifying question.",
     )
+    degraded: bool = Field(
+        default=False,
+        description=(
+            "Whether the message is the canned reply served while the LLM provider is "
+            "unavailable. Such turns are not stored in the conversation history."
+        ),
+    )
 
 
 class ChatResponse(BaseModel):
     conversation_id: str = Field(
-        ..., description="Echoed or generated conversation identifier."
+        ...,
+        description=(
+            "Echoed or newly issued conversation identifier; send it with the next turn."
+        ),
     )
     message: ChatMessage = Field(..., description="Assistant message for this turn.")
     action_metadata: ActionMetadata = Field(
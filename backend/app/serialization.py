@@ -0,0 +1,95 @@
+"""
+JSON encoding shared by the agent, the tools and the HTTP responses.
+
+orjson is used when it is installed (JSON_BACKEND=auto) and the standard library
+otherwise. Both backends produce equivalent compact UTF-8 JSON, but the bytes
+can differ (float formatting, for example), so cache keys are backend-specific:
+workers sharing an answer cache should use the same backend.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse
+
+from .config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+Encoder = Callable[[Any, bool], bytes]
+Decoder = Callable[[str | bytes], Any]
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=str
+    ).encode("utf-8")
+
+
+def _orjson_backend() -> tuple[Encoder, Decoder] | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    base = orjson.OPT_NON_STR_KEYS
+    sorted_keys = base | orjson.OPT_SORT_KEYS
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        return orjson.dumps(obj, default=str, option=sorted_keys if sort_keys else base)
+
+    return dumps, orjson.loads
+
+
+@lru_cache(maxsize=1)
+def _backend() -> tuple[str, Encoder, Decoder]:
+    """
+    Resolve JSON_BACKEND once: (name, encoder, decoder).
+    """
+    requested = get_settings()["json_backend"]
+    if requested != "stdlib":
+        orjson_backend = _orjson_backend()
+        if orjson_backend is not None:
+            return "orjson", *orjson_backend
+        if requested == "orjson":
+            logger.warning("JSON_BACKEND=orjson but orjson is not installed.")
+    return "stdlib", _stdlib_dumps, json.loads
+
+
+def json_backend() -> str:
+    """
+    Name of the JSON backend in use: "orjson" or "stdlib".
+    """
+    return _backend()[0]
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Encode `obj` as compact UTF-8 JSON; unknown types are encoded with str().
+    """
+    return _backend()[1](obj, sort_keys)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    return _backend()[1](obj, sort_keys).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    Decode JSON text; invalid input raises json.JSONDecodeError with either backend.
+    """
+    return _backend()[2](data)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with the configured backend (orjson when available).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
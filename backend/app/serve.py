@@ -0,0 +1,120 @@
+"""
+Production launcher: preload once, then fork uvicorn workers that share the socket.
+
+    python -m app.serve --host 0.0.0.0 --port 8000 --workers 4 --warm-connections 4
+
+Unlike `uvicorn --workers`, which spawns fresh interpreters, workers are forked
+after the app, order data, policy index and LLM client are loaded, so they
+share those pages copy-on-write and start serving immediately. Each worker
+opens its own connection pool and reports ready on /health/ready once it is
+warm. Workers that die are restarted; SIGTERM or SIGINT stops them all.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+
+logger = logging.getLogger("bookly.serve")
+
+# A worker that dies sooner than this after starting is not restarted in a
+# tight loop; the launcher waits this long first.
+_RESTART_BACKOFF_SECONDS = 1.0
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    # The parent's handlers would forward signals back to the workers.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def _spawn(config: uvicorn.Config, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(config, sock)
+    return pid
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--warm-connections",
+        type=int,
+        default=None,
+        help="LLM connections each worker opens before reporting ready "
+        "(overrides OPENAI_WARM_CONNECTIONS).",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper())
+    if args.warm_connections is not None:
+        # Settings are read from the environment on first use, below.
+        os.environ["OPENAI_WARM_CONNECTIONS"] = str(args.warm_connections)
+
+    from .main import app, preload
+
+    started = time.perf_counter()
+    preload()
+    logger.info("Preloaded in %.1f ms.", (time.perf_counter() - started) * 1000)
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    sock = config.bind_socket()
+    # Move everything loaded so far out of the collector's generations, so a
+    # collection in a worker does not touch (and copy) the shared pages.
+    gc.freeze()
+
+    workers: dict[int, float] = {}
+    for _ in range(max(1, args.workers)):
+        workers[_spawn(config, sock)] = time.monotonic()
+    logger.info("Started %d workers on %s:%d.", len(workers), args.host, args.port)
+
+    stopping = False
+
+    def stop(signum: int, _frame: object) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started_at = workers.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+        logger.warning("Worker %d exited with status %d; restarting.", pid, status)
+        if time.monotonic() - started_at < _RESTART_BACKOFF_SECONDS:
+            time.sleep(_RESTART_BACKOFF_SECONDS)
+        workers[_spawn(config, sock)] = time.monotonic()
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Protocol
+
+from .cache import TTLCache
+from .config import get_settings
+from .schemas import ChatMessage
+
+
+class SessionStore(Protocol):
+    """
+    Server-side conversation history keyed by conversation_id.
+    """
+
+    async def load(self, conversation_id: str) -> list[ChatMessage] | None: ...
+
+    async def append(self, conversation_id: str, messages: list[ChatMessage]) -> None: ...
+
+    async def replace(self, conversation_id: str, messages: list[ChatMessage]) -> None: ...
+
+
+class MemorySessionStore:
+    """
+    Per-process session store with LRU eviction and a TTL refreshed on every write.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self._cache: TTLCache[tuple[ChatMessage, ...]] = TTLCache(maxsize, ttl_seconds)
+
+    async def load(self, conversation_id: str) -> list[ChatMessage] | None:
+        history = self._cache.get(conversation_id)
+        return list(history) if history is not None else None
+
+    async def append(self, conversation_id: str, messages: list[ChatMessage]) -> None:
+        history = self._cache.get(conversation_id) or ()
+        self._cache.set(conversation_id, history + tuple(messages))
+
+    async def replace(self, conversation_id: str, messages: list[ChatMessage]) -> None:
+        self._cache.set(conversation_id, tuple(messages))
+
+
+_SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    conversation_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_messages (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+# Expired conversations are deleted by a sweep that runs on a write at most this
+# often (or once per TTL, when that is shorter).
+_SWEEP_INTERVAL_SECONDS = 300.0
+
+
+class SqliteSessionStore:
+    """
+    SQLite session store shared by all workers on one host.
+
+    Messages are stored one row each, so a turn only appends its new rows instead
+    of rewriting the whole history. Queries run in the default thread pool to keep
+    the event loop free; each thread holds its own connection. Writes periodically
+    sweep out conversations that have expired, so the file does not grow forever.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float) -> None:
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0.0
+        self._connection().executescript(_SESSION_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, conversation_id: str) -> list[ChatMessage] | None:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT updated_at FROM sessions WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[0] < time.time() - self._ttl_seconds:
+            self._delete(conn, conversation_id)
+            return None
+        rows = conn.execute(
+            "SELECT role, content FROM session_messages "
+            "WHERE conversation_id = ? ORDER BY seq",
+            (conversation_id,),
+        ).fetchall()
+        return [ChatMessage(role=role, content=content) for role, content in rows]
+
+    def _write(self, conversation_id: str, messages: list[ChatMessage], replace: bool) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if replace:
+                conn.execute(
+                    "DELETE FROM session_messages WHERE conversation_id = ?",
+                    (conversation_id,),
+                )
+                start = 0
+            else:
+                (start,) = conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM session_messages "
+                    "WHERE conversation_id = ?",
+                    (conversation_id,),
+                ).fetchone()
+            conn.executemany(
+                "INSERT INTO session_messages (conversation_id, seq, role, content) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (conversation_id, start + i, m.role, m.content)
+                    for i, m in enumerate(messages)
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (conversation_id, updated_at) VALUES (?, ?)",
+                (conversation_id, time.time()),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._maybe_sweep(conn)
+
+    def _maybe_sweep(self, conn: sqlite3.Connection) -> None:
+        now = time.time()
+        with self._sweep_lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + min(_SWEEP_INTERVAL_SECONDS, self._ttl_seconds)
+        cutoff = now - self._ttl_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM session_messages WHERE conversation_id IN "
+                "(SELECT conversation_id FROM sessions WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, conversation_id: str) -> None:
+        conn.execute("DELETE FROM session_messages WHERE conversation_id = ?", (conversation_id,))
+        conn.execute("DELETE FROM sessions WHERE conversation_id = ?", (conversation_id,))
+
+    async def load(self, conversation_id: str) -> list[ChatMessage] | None:
+        return await asyncio.to_thread(self._load, conversation_id)
+
+    async def append(self, conversation_id: str, messages: list[ChatMessage]) -> None:
+        await asyncio.to_thread(self._write, conversation_id, messages, False)
+
+    async def replace(self, conversation_id: str, messages: list[ChatMessage]) -> None:
+        await asyncio.to_thread(self._write, conversation_id, messages, True)
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore | None:
+    """
+    Return the configured session store, or None when SESSION_STORE_BACKEND is off.
+    """
+    settings = get_settings()
+    backend = settings["session_store_backend"]
+    if backend == "memory":
+        return MemorySessionStore(settings["session_store_size"], settings["session_ttl_seconds"])
+    if backend == "sqlite":
+        return SqliteSessionStore(settings["session_store_path"], settings["session_ttl_seconds"])
+    return None
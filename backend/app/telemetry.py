@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any
+
+from .config import get_settings
+
+
+logger = logging.getLogger("bookly.trace")
+
+_DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _label_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple[tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        # Per label set: non-cumulative bucket counts (+Inf last), sum, count.
+        self._series: dict[tuple[tuple[str, str], ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+                self._series[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_label_key(labels))
+        return int(series[1][1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, (total, n)) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, c in zip((*self.buckets, float("inf")), counts):
+                    cumulative += c
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {n:g}")
+        return lines
+
+
+_REGISTRY: list[Counter | Gauge | Histogram] = []
+
+
+def _register(metric: Any) -> Any:
+    _REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines: list[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS: Histogram = _register(
+    Histogram("bookly_stage_duration_seconds", "Duration of each agent turn stage.")
+)
+REQUEST_SECONDS: Histogram = _register(
+    Histogram(
+        "bookly_http_request_duration_seconds",
+        "End-to-end HTTP request duration, including body parsing and validation.",
+    )
+)
+TOOL_SECONDS: Histogram = _register(
+    Histogram(
+        "bookly_tool_duration_seconds",
+        "Duration of individual tool calls.",
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+    )
+)
+TURNS: Counter = _register(Counter("bookly_turns_total", "Agent turns by resulting action."))
+LLM_CALLS: Counter = _register(Counter("bookly_llm_calls_total", "LLM calls by stage."))
+LLM_TOKENS: Counter = _register(
+    Counter(
+        "bookly_llm_tokens_total",
+        "LLM tokens by kind (prompt, cached, completion); cached is a subset of prompt.",
+    )
+)
+DECISION_RETRIES: Counter = _register(
+    Counter("bookly_decision_retries_total", "Decision retries after a schema failure.")
+)
+DECISION_ESCALATIONS: Counter = _register(
+    Counter(
+        "bookly_decision_escalations_total",
+        "Decisions re-asked of the larger model, by reason (parse_error, low_confidence).",
+    )
+)
+LLM_SECONDS: Histogram = _register(
+    Histogram("bookly_llm_call_duration_seconds", "LLM call duration by stage and model.")
+)
+LLM_COST: Counter = _register(
+    Counter("bookly_llm_cost_usd_total", "Estimated LLM spend in USD by stage and model.")
+)
+ANSWER_CACHE: Counter = _register(
+    Counter("bookly_answer_cache_requests_total", "Answer cache lookups by result.")
+)
+TOOL_RESULT_CACHE: Counter = _register(
+    Counter(
+        "bookly_tool_result_cache_requests_total",
+        "Tool result cache lookups by result (hit, miss or stale).",
+    )
+)
+LLM_RETRIES: Counter = _register(
+    Counter("bookly_llm_retries_total", "LLM call retries by stage and reason.")
+)
+LLM_RATE_LIMIT_SECONDS: Histogram = _register(
+    Histogram(
+        "bookly_llm_rate_limit_wait_seconds",
+        "Time LLM calls waited on the client-side RPM/TPM limiter.",
+    )
+)
+SINGLE_FLIGHT: Counter = _register(
+    Counter(
+        "bookly_llm_single_flight_shared_total",
+        "LLM calls answered by an identical request already in flight.",
+    )
+)
+CIRCUIT_OPEN: Gauge = _register(
+    Gauge("bookly_llm_circuit_open", "1 while the LLM circuit breaker is open.")
+)
+ADMISSION_QUEUE_DEPTH: Gauge = _register(
+    Gauge("bookly_admission_queue_depth", "Chat turns waiting for an admission slot.")
+)
+ADMISSION_IN_FLIGHT: Gauge = _register(
+    Gauge("bookly_admission_in_flight", "Chat turns holding an admission slot.")
+)
+ADMISSION_WAIT_SECONDS: Histogram = _register(
+    Histogram(
+        "bookly_admission_wait_seconds",
+        "Time chat turns waited in the admission queue, including shed turns.",
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    )
+)
+ADMISSION_REJECTED: Counter = _register(
+    Counter(
+        "bookly_admission_rejected_total",
+        "Chat turns shed with 429 by reason (queue_full, queue_timeout, key_quota).",
+    )
+)
+STATE_SHORTCUTS: Counter = _register(
+    Counter(
+        "bookly_conversation_state_shortcuts_total",
+        "Tool calls made from cached conversation state without a decision call.",
+    )
+)
+PREFETCHES: Counter = _register(
+    Counter(
+        "bookly_speculative_prefetch_total",
+        "Speculative lookup_order prefetches by outcome (used, wasted).",
+    )
+)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "_otel")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes: dict[str, Any] = {}
+        self._otel: Any = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+        if self._otel is not None:
+            self._otel.set_attribute(key, value)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("bookly_current_span", default=None)
+
+
+@lru_cache(maxsize=1)
+def _exporter() -> tuple[str, Any]:
+    """
+    Resolve TRACING_EXPORTER once: ("none" | "log" | "otel", OpenTelemetry tracer).
+    """
+    exporter = get_settings()["tracing_exporter"]
+    if exporter == "otel":
+        try:
+            from opentelemetry import trace as otel_trace
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otel but opentelemetry is not installed.")
+            return "none", None
+        return "otel", otel_trace.get_tracer("bookly")
+    if exporter == "log":
+        return "log", None
+    return "none", None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """
+    Time an agent stage into bookly_stage_duration_seconds and, when tracing is
+    enabled, export it as a span nested under the current one.
+
+    With TRACING_EXPORTER=none (the default) this is a timer and a histogram
+    update; no span objects are created.
+    """
+    start = time.perf_counter()
+    exporter, otel_tracer = _exporter()
+    if exporter == "none":
+        try:
+            yield _NOOP_SPAN
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+        return
+
+    parent = _CURRENT_SPAN.get()
+    trace_id = parent.trace_id if parent else os.urandom(16).hex()
+    current = Span(name, trace_id, parent.span_id if parent else None)
+    current.attributes.update(attributes)
+    token = _CURRENT_SPAN.set(current)
+    otel_cm = otel_tracer.start_as_current_span(name) if otel_tracer is not None else None
+    if otel_cm is not None:
+        current._otel = otel_cm.__enter__()
+        for key, value in attributes.items():
+            current._otel.set_attribute(key, value)
+    error: BaseException | None = None
+    try:
+        yield current
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=name)
+        _CURRENT_SPAN.reset(token)
+        if otel_cm is not None:
+            otel_cm.__exit__(type(error) if error else None, error, None)
+        elif exporter == "log":
+            logger.info(
+                json.dumps(
+                    {
+                        "span": name,
+                        "trace_id": current.trace_id,
+                        "span_id": current.span_id,
+                        "parent_id": current.parent_id,
+                        "duration_ms": round(duration * 1000, 3),
+                        "error": type(error).__name__ if error else None,
+                        "attributes": current.attributes,
+                    },
+                    default=str,
+                )
+            )
@@ -1,5 +1,6 @@
 from .orders import (
     evaluate_refund_eligibility,
+    evaluate_refund_eligibility_for_customer,
     list_recent_orders,
     lookup_order,
 )
@@ -9,6 +10,7 @@ __all__ = [
     "lookup_order",
     "list_recent_orders",
     "evaluate_refund_eligibility",
+    "evaluate_refund_eligibility_for_customer",
     "get_policy_answer",
 ]
 
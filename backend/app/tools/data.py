@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import date, timedelta
-from typing import TypedDict
+from typing import Any
 
 
-class User(TypedDict):
+# Records are frozen and slotted: no per-instance __dict__, and safe to share
+# between the store, the tools and cached tool results.
+
+
+@dataclass(frozen=True, slots=True)
+class User:
     id: str
     name: str
     email: str
@@ -12,20 +18,30 @@ class User(TypedDict):
     country: str
 
 
-class OrderItem(TypedDict):
+@dataclass(frozen=True, slots=True)
+class OrderItem:
     sku: str
     title: str
     quantity: int
     unit_price: float
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "sku": self.sku,
+            "title": self.title,
+            "quantity": self.quantity,
+            "unit_price": self.unit_price,
+        }
 
-class Order(TypedDict):
+
+@dataclass(frozen=True, slots=True)
+class Order:
     id: str
     user_id: str
     status: str
     total: float
     currency: str
-    items: list[OrderItem]
+    items: tuple[OrderItem, ...]
     ordered_at: date
     shipped_at: date | None
     delivered_at: date | None
@@ -33,139 +49,183 @@ class Order(TypedDict):
     tracking_number: str | None
     destination_city: str
     destination_country: str
+    # JSON-ready forms, built on first use. A changed order is a new record, so
+    # these never go stale.
+    _serialized: dict[str, Any] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _summary: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Full JSON-ready order with ISO dates, cached on the record; do not mutate it.
+        """
+        serialized = self._serialized
+        if serialized is None:
+            serialized = {
+                "id": self.id,
+                "status": self.status,
+                "total": self.total,
+                "currency": self.currency,
+                "items": [item.to_dict() for item in self.items],
+                "ordered_at": self.ordered_at.isoformat(),
+                "shipped_at": self.shipped_at.isoformat() if self.shipped_at else None,
+                "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
+                "carrier": self.carrier,
+                "tracking_number": self.tracking_number,
+                "destination_city": self.destination_city,
+                "destination_country": self.destination_country,
+            }
+            object.__setattr__(self, "_serialized", serialized)
+        return serialized
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Short JSON-ready form used in order lists, cached on the record; do not mutate it.
+        """
+        summary = self._summary
+        if summary is None:
+            summary = {
+                "id": self.id,
+                "status": self.status,
+                "total": self.total,
+                "currency": self.currency,
+                "ordered_at": self.ordered_at.isoformat(),
+            }
+            object.__setattr__(self, "_summary", summary)
+        return summary
 
 
 TODAY = date.today()
 
 
 USERS: list[User] = [
-    {
-        "id": "u_001",
-        "name": "Alice Johnson",
-        "email": "alice@example.com",
-        "city": "New York",
-        "country": "US",
-    },
-    {
-        "id": "u_002",
-        "name": "Brian Lee",
-        "email": "brian@example.com",
-        "city": "San Francisco",
-        "country": "US",
-    },
-    {
-        "id": "u_003",
-        "name": "Carla Martinez",
-        "email": "carla@example.com",
-        "city": "Toronto",
-        "country": "CA",
-    },
+    User(
+        id="u_001",
+        name="Alice Johnson",
+        email="alice@example.com",
+        city="New York",
+        country="US",
+    ),
+    User(
+        id="u_002",
+        name="Brian Lee",
+        email="brian@example.com",
+        city="San Francisco",
+        country="US",
+    ),
+    User(
+        id="u_003",
+        name="Carla Martinez",
+        email="carla@example.com",
+        city="Toronto",
+        country="CA",
+    ),
 ]
 
 
 ORDERS: list[Order] = [
-    {
-        "id": "B-1001",
-        "user_id": "u_001",
-        "status": "delivered",
-        "total": 42.50,
-        "currency": "USD",
-        "items": [
-            {
-                "sku": "BK-9780143127741",
-                "title": "The Martian",
-                "quantity": 1,
-                "unit_price": 15.00,
-            },
-            {
-                "sku": "BK-9780307887443",
-                "title": "Ready Player One",
-                "quantity": 1,
-                "unit_price": 27.50,
-            },
-        ],
-        "ordered_at": TODAY - timedelta(days=14),
-        "shipped_at": TODAY - timedelta(days=12),
-        "delivered_at": TODAY - timedelta(days=9),
-        "carrier": "UPS",
-        "tracking_number": "1Z999AA10123456784",
-        "destination_city": "New York",
-        "destination_country": "US",
-    },
-    {
-        "id": "B-1002",
-        "user_id": "u_001",
-        "status": "shipped",
-        "total": 19.99,
-        "currency": "USD",
-        "items": [
-            {
-                "sku": "BK-9780062316110",
-                "title": "The Alchemist",
-                "quantity": 1,
-                "unit_price": 19.99,
-            },
-        ],
-        "ordered_at": TODAY - timedelta(days=5),
-        "shipped_at": TODAY - timedelta(days=3),
-        "delivered_at": None,
-        "carrier": "FedEx",
-        "tracking_number": "61299999999999999999",
-        "destination_city": "New York",
-        "destination_country": "US",
-    },
-    {
-        "id": "B-1003",
-        "user_id": "u_002",
-        "status": "processing",
-        "total": 59.00,
-        "currency": "USD",
-        "items": [
-            {
-                "sku": "BK-9780385472579",
-                "title": "Zen and the Art of Motorcycle Maintenance",
-                "quantity": 1,
-                "unit_price": 18.00,
-            },
-            {
-                "sku": "BK-9780553293357",
-                "title": "Dune",
-                "quantity": 1,
-                "unit_price": 41.00,
-            },
-        ],
-        "ordered_at": TODAY - timedelta(days=1),
-        "shipped_at": None,
-        "delivered_at": None,
-        "carrier": None,
-        "tracking_number": None,
-        "destination_city": "San Francisco",
-        "destination_country": "US",
-    },
-    {
-        "id": "B-1004",
-        "user_id": "u_003",
-        "status": "delayed",
-        "total": 24.99,
-        "currency": "CAD",
-        "items": [
-            {
-                "sku": "BK-9780307277671",
-                "title": "The Road",
-                "quantity": 1,
-                "unit_price": 24.99,
-            },
-        ],
-        "ordered_at": TODAY - timedelta(days=10),
-        "shipped_at": TODAY - timedelta(days=7),
-        "delivered_at": None,
-        "carrier": "Canada Post",
-        "tracking_number": "CP123456789CA",
-        "destination_city": "Toronto",
-        "destination_country": "CA",
-    },
+    Order(
+        id="B-1001",
+        user_id="u_001",
+        status="delivered",
+        total=42.50,
+        currency="USD",
+        items=(
+            OrderItem(
+                sku="BK-9780143127741",
+                title="The Martian",
+                quantity=1,
+                unit_price=15.00,
+            ),
+            OrderItem(
+                sku="BK-9780307887443",
+                title="Ready Player One",
+                quantity=1,
+                unit_price=27.50,
+            ),
+        ),
+        ordered_at=TODAY - timedelta(days=14),
+        shipped_at=TODAY - timedelta(days=12),
+        delivered_at=TODAY - timedelta(days=9),
+        carrier="UPS",
+        tracking_number="1Z999AA10123456784",
+        destination_city="New York",
+        destination_country="US",
+    ),
+    Order(
+        id="B-1002",
+        user_id="u_001",
+        status="shipped",
+        total=19.99,
+        currency="USD",
+        items=(
+            OrderItem(
+                sku="BK-9780062316110",
+                title="The Alchemist",
+                quantity=1,
+                unit_price=19.99,
+            ),
+        ),
+        ordered_at=TODAY - timedelta(days=5),
+        shipped_at=TODAY - timedelta(days=3),
+        delivered_at=None,
+        carrier="FedEx",
+        tracking_number="61299999999999999999",
+        destination_city="New York",
+        destination_country="US",
+    ),
+    Order(
+        id="B-1003",
+        user_id="u_002",
+        status="processing",
+        total=59.00,
+        currency="USD",
+        items=(
+            OrderItem(
+                sku="BK-9780385472579",
+                title="Zen and the Art of Motorcycle Maintenance",
+                quantity=1,
+                unit_price=18.00,
+            ),
+            OrderItem(
+                sku="BK-9780553293357",
+                title="Dune",
+                quantity=1,
+                unit_price=41.00,
+            ),
+        ),
+        ordered_at=TODAY - timedelta(days=1),
+        shipped_at=None,
+        delivered_at=None,
+        carrier=None,
+        tracking_number=None,
+        destination_city="San Francisco",
+        destination_country="US",
+    ),
+    Order(
+        id="B-1004",
+        user_id="u_003",
+        status="delayed",
+        total=24.99,
+        currency="CAD",
+        items=(
+            OrderItem(
+                sku="BK-9780307277671",
+                title="The Road",
+                quantity=1,
+                unit_price=24.99,
+            ),
+        ),
+        ordered_at=TODAY - timedelta(days=10),
+        shipped_at=TODAY - timedelta(days=7),
+        delivered_at=None,
+        carrier="Canada Post",
+        tracking_number="CP123456789CA",
+        destination_city="Toronto",
+        destination_country="CA",
+    ),
 ]
 
 
 REFUND_WINDOW_DAYS = 30
-
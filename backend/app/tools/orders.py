@@ -3,7 +3,9 @@ from __future__ import annotations
 from datetime import date
 from typing import Any, TypedDict
 
-from .data import ORDERS, REFUND_WINDOW_DAYS, USERS
+from ..cache import get_tool_result_cache
+from .data import REFUND_WINDOW_DAYS, Order
+from .store import get_order_store
 
 
 class OrderLookupResult(TypedDict):
@@ -19,27 +21,52 @@ class RefundEligibilityResult(TypedDict):
     currency: str
 
 
+class CustomerRefundEligibilityResult(TypedDict):
+    orders: list[dict[str, Any]]
+    order_count: int
+    refundable_totals: dict[str, float]
+
+
+ORDER_NOT_FOUND_REASON = "No order found with the provided order id."
+
+# Orders listed individually by evaluate_refund_eligibility_for_customer; the
+# result goes into the answer prompt, so long order histories are cut here.
+_MAX_LISTED_ORDERS = 10
+
+_DAMAGE_KEYWORDS = ("damaged", "defective", "wrong item", "misprint")
+
+
 def _normalize(s: str) -> str:
     return s.strip().lower()
 
 
+# Each tool is memoized on its normalized arguments and validated against the
+# store's version stamp for the order or customer it reads; see ToolResultCache.
 def lookup_order(order_id: str, email_or_last_name: str) -> OrderLookupResult:
     """
     Look up an order by id and email or last name.
     """
-    order_id_norm = _normalize(order_id)
+    return get_tool_result_cache().memoize(
+        "lookup_order",
+        (_normalize(order_id), _normalize(email_or_last_name)),
+        lambda: get_order_store().order_version(order_id),
+        lambda: _lookup_order(order_id, email_or_last_name),
+    )
+
+
+def _lookup_order(order_id: str, email_or_last_name: str) -> OrderLookupResult:
+    store = get_order_store()
     email_name_norm = _normalize(email_or_last_name)
 
-    matching_orders = [o for o in ORDERS if _normalize(o["id"]) == order_id_norm]
-    if not matching_orders:
+    order = store.get_order(order_id)
+    if order is None:
         return {
             "found": False,
-            "reason": "No order found with the provided order id.",
+            "reason": ORDER_NOT_FOUND_REASON,
             "order": None,
         }
 
-    order = matching_orders[0]
-    user = next((u for u in USERS if u["id"] == order["user_id"]), None)
+    user = store.get_user(order.user_id)
     if user is None:
         return {
             "found": False,
@@ -47,30 +74,19 @@ def lookup_order(order_id: str, email_or_last_name: str) -> OrderLookupResult:
             "order": None,
         }
 
-    if email_name_norm not in {_normalize(user["email"]), _normalize(user["name"].split()[-1])}:
+    if email_name_norm not in {_normalize(user.email), _normalize(user.name.split()[-1])}:
         return {
             "found": False,
             "reason": "Customer details do not match the order on file.",
             "order": None,
         }
 
+    # The order's serialized form is cached on the record; only the customer
+    # fields are added per call.
     enriched = {
-        "id": order["id"],
-        "status": order["status"],
-        "total": order["total"],
-        "currency": order["currency"],
-        "items": order["items"],
-        "ordered_at": order["ordered_at"].isoformat(),
-        "shipped_at": order["shipped_at"].isoformat() if order["shipped_at"] else None,
-        "delivered_at": order["delivered_at"].isoformat()
-        if order["delivered_at"]
-        else None,
-        "carrier": order["carrier"],
-        "tracking_number": order["tracking_number"],
-        "destination_city": order["destination_city"],
-        "destination_country": order["destination_country"],
-        "customer_name": user["name"],
-        "customer_email": user["email"],
+        **order.to_dict(),
+        "customer_name": user.name,
+        "customer_email": user.email,
     }
 
     return {
@@ -84,49 +100,58 @@ def list_recent_orders(email: str, limit: int = 3) -> list[dict[str, Any]]:
     """
     Return recent orders for a given customer email, newest first.
     """
-    email_norm = _normalize(email)
-    user_ids = [u["id"] for u in USERS if _normalize(u["email"]) == email_norm]
-    if not user_ids:
+    return get_tool_result_cache().memoize(
+        "list_recent_orders",
+        (_normalize(email), str(limit)),
+        lambda: get_order_store().customer_version(email),
+        lambda: _list_recent_orders(email, limit),
+    )
+
+
+def _list_recent_orders(email: str, limit: int) -> list[dict[str, Any]]:
+    store = get_order_store()
+    users = store.users_by_email(email)
+    if not users:
         return []
 
-    user_orders = [o for o in ORDERS if o["user_id"] in user_ids]
-    user_orders.sort(key=lambda o: o["ordered_at"], reverse=True)
-
-    result: list[dict[str, Any]] = []
-    for order in user_orders[:limit]:
-        result.append(
-            {
-                "id": order["id"],
-                "status": order["status"],
-                "total": order["total"],
-                "currency": order["currency"],
-                "ordered_at": order["ordered_at"].isoformat(),
-            }
-        )
-    return result
+    user_orders: list[Order] = []
+    for user in users:
+        user_orders.extend(store.recent_orders_for_user(user.id, limit))
+    if len(users) > 1:
+        user_orders.sort(key=lambda o: o.ordered_at, reverse=True)
+
+    return [order.summary() for order in user_orders[:limit]]
 
 
 def evaluate_refund_eligibility(order_id: str, reason: str) -> RefundEligibilityResult:
     """
     Evaluate whether an order is eligible for a refund based on synthetic rules.
     """
-    order_id_norm = _normalize(order_id)
+    # The reason only matters through whether it reports damage.
     reason_norm = _normalize(reason)
-
-    matching_orders = [o for o in ORDERS if _normalize(o["id"]) == order_id_norm]
-    if not matching_orders:
+    is_damaged = any(word in reason_norm for word in _DAMAGE_KEYWORDS)
+    return get_tool_result_cache().memoize(
+        "evaluate_refund_eligibility",
+        (_normalize(order_id), "damaged" if is_damaged else ""),
+        lambda: get_order_store().order_version(order_id),
+        lambda: _evaluate_refund_eligibility(order_id, is_damaged),
+    )
+
+
+def _evaluate_refund_eligibility(order_id: str, is_damaged: bool) -> RefundEligibilityResult:
+    order = get_order_store().get_order(order_id)
+    if order is None:
         return {
             "eligible": False,
-            "reason": "No order found with the provided order id.",
+            "reason": ORDER_NOT_FOUND_REASON,
             "refundable_amount": 0.0,
             "currency": "USD",
         }
 
-    order = matching_orders[0]
-    currency = order["currency"]
+    currency = order.currency
 
     today = date.today()
-    delivered_at = order["delivered_at"]
+    delivered_at = order.delivered_at
 
     if delivered_at is None:
         return {
@@ -146,10 +171,7 @@ def evaluate_refund_eligibility(order_id: str, reason: str) -> RefundEligibility
             "currency": currency,
         }
 
-    damage_keywords = {"damaged", "defective", "wrong item", "misprint"}
-    is_damaged = any(word in reason_norm for word in damage_keywords)
-
-    refundable_amount = order["total"]
+    refundable_amount = order.total
     explanation = "Order is within the return window."
     if is_damaged:
         explanation = (
@@ -163,3 +185,51 @@ def evaluate_refund_eligibility(order_id: str, reason: str) -> RefundEligibility
         "currency": currency,
     }
 
+
+def evaluate_refund_eligibility_for_customer(email: str) -> CustomerRefundEligibilityResult:
+    """
+    Evaluate refund eligibility for every order of the customer with this email.
+
+    The newest orders (at most ten) are listed with their eligibility, alongside
+    the customer's total order count and the refundable amount per currency
+    across all of their orders.
+    """
+    return get_tool_result_cache().memoize(
+        "evaluate_refund_eligibility_for_customer",
+        (_normalize(email),),
+        lambda: get_order_store().customer_version(email),
+        lambda: _evaluate_refund_eligibility_for_customer(email),
+    )
+
+
+def _evaluate_refund_eligibility_for_customer(email: str) -> CustomerRefundEligibilityResult:
+    from .refunds import NOT_DELIVERED, sweep_refund_eligibility
+
+    store = get_order_store()
+    user_orders: list[Order] = []
+    for user in store.users_by_email(email):
+        user_orders.extend(store.recent_orders_for_user(user.id))
+    user_orders.sort(key=lambda o: o.ordered_at, reverse=True)
+
+    sweep = sweep_refund_eligibility(user_orders)
+    orders: list[dict[str, Any]] = []
+    listed = zip(
+        user_orders[:_MAX_LISTED_ORDERS], sweep.eligible, sweep.days_since_delivery
+    )
+    for order, eligible, days in listed:
+        if days == NOT_DELIVERED:
+            reason = "Not delivered yet."
+        elif eligible:
+            reason = f"Delivered {days} days ago, within the return window."
+        else:
+            reason = (
+                f"Delivered {days} days ago, outside the {REFUND_WINDOW_DAYS}-day "
+                "return window."
+            )
+        orders.append({**order.summary(), "eligible": bool(eligible), "reason": reason})
+
+    return {
+        "orders": orders,
+        "order_count": len(user_orders),
+        "refundable_totals": sweep.refundable_totals,
+    }
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TypedDict
 
+from ..config import get_settings
+
 
 class PolicyAnswer(TypedDict):
     topic: str
@@ -53,6 +55,11 @@ POLICIES: dict[str, PolicyAnswer] = {
 def get_policy_answer(topic: str) -> PolicyAnswer | None:
     """
     Return the best matching policy answer for a given topic keyword.
+
+    Topics that match no policy name, such as free-text questions, are answered
+    from the policy retrieval index, but only when one topic clearly wins:
+    its best passage must reach POLICY_MIN_SCORE (BM25) and beat every other
+    topic's by POLICY_MIN_MARGIN times. Otherwise there is no answer.
     """
     key = topic.strip().lower()
     if key in POLICIES:
@@ -63,5 +70,23 @@ def get_policy_answer(topic: str) -> PolicyAnswer | None:
         if key in name or name in key:
             return policy
 
-    return None
+    # Imported here: the retrieval index is built from POLICIES.
+    from .retrieval import search_policies
+
+    hits = search_policies(topic, k=10)
+    if not hits:
+        return None
+    settings = get_settings()
+    top = max(hits, key=lambda hit: hit["bm25"])
+    best = top["topic"]
+    runner_up = max((hit["bm25"] for hit in hits if hit["topic"] != best), default=0.0)
+    if top["bm25"] < settings["policy_min_score"] or (
+        top["bm25"] < settings["policy_min_margin"] * runner_up
+    ):
+        return None
+    if best in POLICIES:
+        return POLICIES[best]
+    # A policy document outside the built-in set: answer with its best passages.
+    texts = [hit["text"] for hit in hits if hit["topic"] == best]
+    return {"topic": best, "summary": texts[0], "details": " ".join(texts[1:])}
 
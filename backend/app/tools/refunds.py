@@ -0,0 +1,171 @@
+"""
+Bulk refund eligibility over a columnar view of orders.
+
+    python -m app.tools.refunds --as-of 2025-01-31
+    python -m app.tools.refunds --database bookly_orders.db
+
+Eligibility only depends on the delivery date, so a whole order book is
+evaluated with one vectorized pass: NumPy datetime64 arithmetic when NumPy is
+installed, and a plain loop over the same columns otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Any
+
+from .data import REFUND_WINDOW_DAYS, Order
+from .store import OrderRepository, get_order_store
+
+
+# Delivery dates are stored as days since 1970-01-01, the datetime64[D] epoch,
+# and a missing date as the int64 bit pattern NumPy reads as NaT.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NOT_DELIVERED = -(2**63)
+
+
+@lru_cache(maxsize=1)
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@dataclass(frozen=True, slots=True)
+class OrderColumns:
+    """
+    Columnar view of the order fields refund eligibility needs.
+
+    Numeric columns are flat arrays that NumPy wraps without copying; currencies
+    are small integer codes into `currencies`.
+    """
+
+    ids: tuple[str, ...]
+    currencies: tuple[str, ...]
+    currency_codes: array  # 'H'
+    totals: array  # 'd'
+    delivered_days: array  # 'q', days since epoch or NOT_DELIVERED
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def order_columns(orders: Iterable[Order]) -> OrderColumns:
+    """
+    Build the columnar view in one pass over `orders`.
+    """
+    ids: list[str] = []
+    codes: dict[str, int] = {}
+    currency_codes = array("H")
+    totals = array("d")
+    delivered_days = array("q")
+    for order in orders:
+        ids.append(order.id)
+        currency_codes.append(codes.setdefault(order.currency, len(codes)))
+        totals.append(order.total)
+        delivered_at = order.delivered_at
+        delivered_days.append(
+            delivered_at.toordinal() - _EPOCH_ORDINAL if delivered_at else NOT_DELIVERED
+        )
+    return OrderColumns(tuple(ids), tuple(codes), currency_codes, totals, delivered_days)
+
+
+@dataclass(frozen=True, slots=True)
+class RefundSweep:
+    """
+    Eligibility of every order in `columns` as of one date.
+
+    `eligible` and `days_since_delivery` are NumPy arrays when NumPy is installed
+    and plain sequences otherwise; undelivered orders have NOT_DELIVERED days.
+    """
+
+    columns: OrderColumns
+    as_of: date
+    eligible: Sequence[bool]
+    days_since_delivery: Sequence[int]
+    eligible_count: int
+    refundable_totals: dict[str, float]
+
+
+def sweep_refund_eligibility(
+    orders: OrderColumns | Iterable[Order],
+    as_of: date | None = None,
+    window_days: int = REFUND_WINDOW_DAYS,
+) -> RefundSweep:
+    """
+    Evaluate refund eligibility for many orders at once.
+
+    An order is eligible when it was delivered at most `window_days` before
+    `as_of` (today by default), the same rule as evaluate_refund_eligibility.
+    Refundable totals are summed per currency over the eligible orders.
+    """
+    columns = orders if isinstance(orders, OrderColumns) else order_columns(orders)
+    as_of = as_of or date.today()
+    np = _numpy()
+    if np is not None and len(columns):
+        delivered = np.frombuffer(columns.delivered_days, dtype="datetime64[D]")
+        age = np.datetime64(as_of, "D") - delivered
+        eligible = ~np.isnat(age) & (age <= np.timedelta64(window_days, "D"))
+        days = age.astype("int64")
+        codes = np.frombuffer(columns.currency_codes, dtype=np.uint16)
+        totals = np.frombuffer(columns.totals, dtype=np.float64)
+        sums = np.bincount(
+            codes[eligible], weights=totals[eligible], minlength=len(columns.currencies)
+        )
+        refundable = {c: round(float(sums[i]), 2) for i, c in enumerate(columns.currencies)}
+        count = int(np.count_nonzero(eligible))
+        return RefundSweep(columns, as_of, eligible, days, count, refundable)
+
+    today = as_of.toordinal() - _EPOCH_ORDINAL
+    eligible_list: list[bool] = []
+    days_list = array("q")
+    refundable = dict.fromkeys(columns.currencies, 0.0)
+    for code, total, delivered_day in zip(
+        columns.currency_codes, columns.totals, columns.delivered_days
+    ):
+        if delivered_day == NOT_DELIVERED:
+            days_list.append(NOT_DELIVERED)
+            eligible_list.append(False)
+            continue
+        age_days = today - delivered_day
+        days_list.append(age_days)
+        ok = age_days <= window_days
+        eligible_list.append(ok)
+        if ok:
+            refundable[columns.currencies[code]] += total
+    refundable = {c: round(total, 2) for c, total in refundable.items()}
+    count = sum(eligible_list)
+    return RefundSweep(columns, as_of, eligible_list, days_list, count, refundable)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", help="SQLite order store (default: the configured store).")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None)
+    args = parser.parse_args(argv)
+
+    if args.database:
+        from .sqlite_store import SqliteOrderStore
+
+        store: OrderRepository = SqliteOrderStore(args.database, pool_size=1)
+    else:
+        store = get_order_store()
+
+    sweep = sweep_refund_eligibility(store.iter_orders(), args.as_of)
+    print(
+        f"{sweep.eligible_count} of {len(sweep.columns)} orders refundable "
+        f"as of {sweep.as_of.isoformat()}"
+    )
+    for currency, total in sorted(sweep.refundable_totals.items()):
+        print(f"{currency} {total:.2f}")
+
+
+if __name__ == "__main__":
+    main()
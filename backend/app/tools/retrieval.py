@@ -0,0 +1,468 @@
+"""
+Local retrieval index over Bookly policy documents.
+
+Passages are scored with BM25; when NumPy is installed, a cosine ranking over a
+precomputed matrix of hashed term vectors is fused in with reciprocal rank
+fusion. These vectors are hashed term counts, not learned embeddings: they
+re-weight the same words BM25 matches and add no semantic matching. The index is a single file that is memory-mapped on load, so forked
+workers share its pages, and reindexing only re-processes documents whose
+content changed. Running workers rebuild their index when a document or the
+index file changes, checking at most every POLICY_RELOAD_SECONDS.
+
+    python -m app.tools.retrieval "how long does a refund take" --index policies.idx
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, TypedDict
+
+from ..config import get_settings
+from .policies import POLICIES
+
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"BKPIDX1\n"
+_HEADER = struct.Struct("<8sQ")
+_K1 = 1.2
+_B = 0.75
+_VECTOR_DIM = 512
+# Standard reciprocal rank fusion constant.
+_RRF_K = 60
+_MAX_PASSAGE_WORDS = 30
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its my of on or "
+    "the to was what when where which who will with you your".split()
+)
+
+
+class PolicyPassage(TypedDict):
+    """
+    A search hit. `score` orders the hits (fused when NumPy is installed);
+    `bm25` is the passage's BM25 score, comparable across queries.
+    """
+
+    topic: str
+    text: str
+    score: float
+    bm25: float
+
+
+class _StoredPassage(TypedDict):
+    doc: str
+    topic: str
+    text: str
+    length: int
+
+
+@lru_cache(maxsize=1)
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def split_passages(text: str) -> list[str]:
+    """
+    Split a document into paragraphs, and long paragraphs into sentence groups.
+    """
+    passages: list[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current: list[str] = []
+        words = 0
+        for sentence in _SENTENCE_END.split(" ".join(paragraph.split())):
+            if not sentence:
+                continue
+            n = len(sentence.split())
+            if current and words + n > _MAX_PASSAGE_WORDS:
+                passages.append(" ".join(current))
+                current, words = [], 0
+            current.append(sentence)
+            words += n
+        if current:
+            passages.append(" ".join(current))
+    return passages
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) % _VECTOR_DIM
+
+
+class PolicyIndex:
+    """
+    BM25 postings (and optionally a cosine matrix) over policy passages.
+
+    Postings are a flat uint32 array of (passage, term frequency) pairs, with
+    each term's (offset, count) slice kept in the vocabulary.
+    """
+
+    def __init__(self) -> None:
+        self._passages: list[_StoredPassage] = []
+        self._fingerprints: dict[str, str] = {}
+        self._vocab: dict[str, tuple[int, int]] = {}
+        self._postings: Any = array("I")
+        self._vectors: Any = None
+        self._avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+    @classmethod
+    def load(cls, path: str) -> PolicyIndex:
+        """
+        Memory-map an index written by save().
+        """
+        index = cls()
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_length = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a policy index.")
+        meta = json.loads(mapped[_HEADER.size : _HEADER.size + meta_length])
+
+        index._passages = meta["passages"]
+        index._fingerprints = meta["fingerprints"]
+        index._vocab = {term: (o, c) for term, (o, c) in meta["vocab"].items()}
+        start, count = meta["postings"]
+        index._postings = memoryview(mapped)[start : start + count * 4].cast("I")
+        np = _numpy()
+        if np is not None and meta.get("vectors"):
+            start, rows = meta["vectors"]
+            index._vectors = np.frombuffer(
+                mapped, dtype=np.float32, count=rows * _VECTOR_DIM, offset=start
+            ).reshape(rows, _VECTOR_DIM)
+        index._update_stats()
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a single file, atomically replacing any previous one.
+        """
+        postings = bytes(self._postings)
+        vectors = self._vectors.astype("<f4").tobytes() if self._vectors is not None else b""
+        meta: dict[str, Any] = {
+            "passages": self._passages,
+            "fingerprints": self._fingerprints,
+            "vocab": self._vocab,
+        }
+        # Offsets depend on the metadata length, which depends on the offsets;
+        # reserve fixed-width placeholders and fill them in once known.
+        meta["postings"] = [0, 0]
+        meta["vectors"] = [0, 0] if vectors else None
+        placeholder = json.dumps(meta).encode("utf-8")
+        meta_length = len(placeholder) + 64
+        postings_start = _align(_HEADER.size + meta_length)
+        vectors_start = _align(postings_start + len(postings))
+        meta["postings"] = [postings_start, len(postings) // 4]
+        if vectors:
+            meta["vectors"] = [vectors_start, len(self._passages)]
+        encoded = json.dumps(meta).encode("utf-8").ljust(meta_length)
+
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, meta_length))
+            f.write(encoded)
+            f.write(b"\0" * (postings_start - f.tell()))
+            f.write(postings)
+            if vectors:
+                f.write(b"\0" * (vectors_start - f.tell()))
+                f.write(vectors)
+        os.replace(tmp, path)
+
+    def reindex(self, documents: dict[str, tuple[str, str]]) -> bool:
+        """
+        Bring the index in line with `documents` ({doc id: (topic, text)}).
+
+        Only new or changed documents are split and tokenized; postings and
+        vectors of unchanged passages are carried over. Returns whether
+        anything changed.
+        """
+        fingerprints = {
+            doc: hashlib.sha256(f"{topic}\0{text}".encode("utf-8")).hexdigest()
+            for doc, (topic, text) in documents.items()
+        }
+        changed = sorted(d for d, fp in fingerprints.items() if self._fingerprints.get(d) != fp)
+        removed = set(self._fingerprints) - set(fingerprints)
+        if not changed and not removed:
+            return False
+        dropped = set(changed) | removed
+
+        remap: dict[int, int] = {}
+        passages: list[_StoredPassage] = []
+        for old_id, passage in enumerate(self._passages):
+            if passage["doc"] not in dropped:
+                remap[old_id] = len(passages)
+                passages.append(passage)
+
+        term_postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for term, (offset, count) in self._vocab.items():
+            for i in range(offset, offset + count):
+                new_id = remap.get(self._postings[2 * i])
+                if new_id is not None:
+                    term_postings[term].append((new_id, self._postings[2 * i + 1]))
+
+        new_counts: list[Counter[str]] = []
+        for doc in changed:
+            topic, text = documents[doc]
+            for passage_text in split_passages(text):
+                counts = Counter(tokenize(passage_text))
+                passage_id = len(passages)
+                passages.append(
+                    {
+                        "doc": doc,
+                        "topic": topic,
+                        "text": passage_text,
+                        "length": sum(counts.values()),
+                    }
+                )
+                for term, tf in counts.items():
+                    term_postings[term].append((passage_id, tf))
+                new_counts.append(counts)
+
+        np = _numpy()
+        if np is not None:
+            kept = (
+                self._vectors[sorted(remap)]
+                if self._vectors is not None and remap
+                else np.zeros((len(remap), _VECTOR_DIM), dtype=np.float32)
+            )
+            self._vectors = np.vstack([kept, _vectorize(np, new_counts)]).astype(np.float32)
+
+        vocab: dict[str, tuple[int, int]] = {}
+        postings = array("I")
+        for term in sorted(term_postings):
+            entries = term_postings[term]
+            vocab[term] = (len(postings) // 2, len(entries))
+            for passage_id, tf in entries:
+                postings.extend((passage_id, tf))
+
+        self._passages = passages
+        self._fingerprints = fingerprints
+        self._vocab = vocab
+        self._postings = postings
+        self._update_stats()
+        return True
+
+    def _update_stats(self) -> None:
+        total = sum(p["length"] for p in self._passages)
+        self._avg_length = total / len(self._passages) if self._passages else 0.0
+
+    def _bm25(self, terms: list[str]) -> dict[int, float]:
+        n = len(self._passages)
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            entry = self._vocab.get(term)
+            if entry is None:
+                continue
+            offset, count = entry
+            idf = math.log(1 + (n - count + 0.5) / (count + 0.5))
+            for i in range(offset, offset + count):
+                passage_id = self._postings[2 * i]
+                tf = self._postings[2 * i + 1]
+                length = self._passages[passage_id]["length"]
+                norm = _K1 * (1 - _B + _B * length / (self._avg_length or 1.0))
+                scores[passage_id] += idf * tf * (_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = 3) -> list[PolicyPassage]:
+        """
+        Top-k passages for `query`; empty when no query term is in the index.
+        """
+        terms = tokenize(query)
+        scores = bm25 = self._bm25(terms)
+        if not scores:
+            return []
+        ranking = sorted(scores, key=lambda p: -scores[p])
+
+        np = _numpy()
+        if np is not None and self._vectors is not None and len(self._vectors):
+            query_vector = _vectorize(np, [Counter(terms)], self._idf)[0]
+            similarities = self._vectors @ query_vector
+            cosine_ranking = [
+                int(p) for p in np.argsort(-similarities)[: len(ranking)] if similarities[p] > 0
+            ]
+            fused: dict[int, float] = defaultdict(float)
+            for ranks in (ranking, cosine_ranking):
+                for rank, passage_id in enumerate(ranks):
+                    fused[passage_id] += 1.0 / (_RRF_K + rank + 1)
+            scores = fused
+            ranking = sorted(fused, key=lambda p: -fused[p])
+
+        return [
+            {
+                "topic": self._passages[p]["topic"],
+                "text": self._passages[p]["text"],
+                "score": round(scores[p], 6),
+                "bm25": round(bm25.get(p, 0.0), 6),
+            }
+            for p in ranking[:k]
+        ]
+
+    def _idf(self, term: str) -> float:
+        entry = self._vocab.get(term)
+        count = entry[1] if entry else 0
+        n = len(self._passages)
+        return math.log(1 + (n - count + 0.5) / (count + 0.5))
+
+
+def _vectorize(np: Any, counts: list[Counter[str]], idf: Any = None) -> Any:
+    """
+    L2-normalized hashed term vectors; passages use log-scaled tf and the query
+    additionally weights its terms by idf, so stored rows never need rescaling.
+    """
+    matrix = np.zeros((len(counts), _VECTOR_DIM), dtype=np.float32)
+    for row, terms in enumerate(counts):
+        for term, tf in terms.items():
+            weight = 1.0 + math.log(tf)
+            matrix[row, _bucket(term)] += weight * (idf(term) if idf else 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def policy_documents(docs_dir: str = "") -> dict[str, tuple[str, str]]:
+    """
+    Built-in policies plus any .md/.txt files in `docs_dir` (topic = file stem).
+    """
+    documents = {
+        f"policy:{name}": (name, f"{policy['summary']} {policy['details']}")
+        for name, policy in POLICIES.items()
+    }
+    if docs_dir:
+        for path in sorted(Path(docs_dir).glob("*")):
+            if path.suffix in {".md", ".txt"} and path.is_file():
+                documents[f"file:{path.name}"] = (path.stem, path.read_text(encoding="utf-8"))
+    return documents
+
+
+def build_index(path: str = "", docs_dir: str = "") -> PolicyIndex:
+    """
+    Load the index from `path` if it exists, reindex changed documents, and save
+    it back when anything changed. Without a path the index lives in memory.
+    """
+    index = PolicyIndex.load(path) if path and os.path.exists(path) else PolicyIndex()
+    if index.reindex(policy_documents(docs_dir)) and path:
+        index.save(path)
+        index = PolicyIndex.load(path)
+    return index
+
+
+def _source_stamp(path: str, docs_dir: str) -> tuple[Any, ...]:
+    """
+    Modification times of the index file and the policy documents.
+    """
+    stamp: list[Any] = [os.stat(path).st_mtime_ns if path and os.path.exists(path) else 0]
+    if docs_dir:
+        for doc in sorted(Path(docs_dir).glob("*")):
+            if doc.suffix in {".md", ".txt"} and doc.is_file():
+                stamp.append((doc.name, doc.stat().st_mtime_ns))
+    return tuple(stamp)
+
+
+class _ReloadingIndex:
+    """
+    The worker's policy index, rebuilt and swapped in when its sources change.
+
+    Sources are checked at most every `check_seconds` (never when it is 0);
+    searches in flight keep using the index they started with.
+    """
+
+    def __init__(self, path: str, docs_dir: str, check_seconds: float) -> None:
+        self._path = path
+        self._docs_dir = docs_dir
+        self._check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._index = build_index(path, docs_dir)
+        self._stamp = _source_stamp(path, docs_dir)
+        self._next_check = time.monotonic() + check_seconds
+
+    def get(self) -> PolicyIndex:
+        if self._check_seconds <= 0 or time.monotonic() < self._next_check:
+            return self._index
+        with self._lock:
+            if time.monotonic() >= self._next_check:
+                stamp = _source_stamp(self._path, self._docs_dir)
+                if stamp != self._stamp:
+                    try:
+                        self._index = build_index(self._path, self._docs_dir)
+                    except Exception:
+                        # Keep serving the old index; the next check retries.
+                        logger.exception("Rebuilding the policy index failed.")
+                    else:
+                        # Rebuilding may have rewritten the index file.
+                        self._stamp = _source_stamp(self._path, self._docs_dir)
+                self._next_check = time.monotonic() + self._check_seconds
+        return self._index
+
+
+@lru_cache(maxsize=1)
+def _reloading_index() -> _ReloadingIndex:
+    settings = get_settings()
+    return _ReloadingIndex(
+        settings["policy_index_path"],
+        settings["policy_docs_dir"],
+        settings["policy_reload_seconds"],
+    )
+
+
+def get_policy_index() -> PolicyIndex:
+    return _reloading_index().get()
+
+
+def search_policies(query: str, k: int = 3) -> list[PolicyPassage]:
+    return get_policy_index().search(query, k)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("query", nargs="?", help="Search the index after reindexing.")
+    parser.add_argument("--index", default="", help="Index file to update.")
+    parser.add_argument("--docs", default="", help="Directory of extra .md/.txt policies.")
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    index = build_index(args.index, args.docs)
+    print(f"{len(index)} passages indexed")
+    if args.query:
+        for hit in index.search(args.query, args.k):
+            print(f"{hit['score']:.4f}  bm25 {hit['bm25']:.4f}  [{hit['topic']}] {hit['text']}")
+
+
+if __name__ == "__main__":
+    main()
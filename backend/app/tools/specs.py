@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import inspect
+from collections.abc import Callable
+from typing import Any, get_type_hints
+
+from .orders import (
+    evaluate_refund_eligibility,
+    evaluate_refund_eligibility_for_customer,
+    list_recent_orders,
+    lookup_order,
+)
+from .policies import get_policy_answer
+
+
+_JSON_TYPES: dict[type, str] = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def function_spec(fn: Callable[..., Any], name: str | None = None) -> dict[str, Any]:
+    """
+    Build an OpenAI function-calling spec from a tool's signature and docstring.
+
+    Only parameters without defaults are exposed, matching the arguments the agent
+    forwards; this keeps every spec valid under strict schema enforcement.
+    """
+    hints = get_type_hints(fn)
+    properties: dict[str, Any] = {}
+    for param_name, param in inspect.signature(fn).parameters.items():
+        if param.default is not inspect.Parameter.empty:
+            continue
+        param_type = hints.get(param_name, str)
+        properties[param_name] = {"type": _JSON_TYPES.get(param_type, "string")}
+
+    spec_name = name or fn.__name__
+    doc = inspect.getdoc(fn) or spec_name
+    return {
+        "type": "function",
+        "function": {
+            "name": spec_name,
+            "description": doc.split("\n\n")[0],
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def _ask_clarification(clarifying_question: str) -> None:
+    """
+    Ask the customer for information that is missing, such as an order id or email.
+    """
+
+
+def _answer(answer_text: str) -> None:
+    """
+    Reply to the customer directly when no tool is needed.
+    """
+
+
+# Built once at import; the list is sent verbatim with every decision request.
+TOOL_SPECS: tuple[dict[str, Any], ...] = (
+    function_spec(lookup_order),
+    function_spec(list_recent_orders),
+    function_spec(evaluate_refund_eligibility),
+    function_spec(evaluate_refund_eligibility_for_customer),
+    function_spec(get_policy_answer),
+    function_spec(_ask_clarification, name="ask_clarification"),
+    function_spec(_answer, name="answer"),
+)
@@ -0,0 +1,467 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import queue
+import sqlite3
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import date
+from itertools import chain
+from pathlib import Path
+from typing import Any
+
+from .data import ORDERS, USERS, Order, OrderItem, User
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    email_norm TEXT NOT NULL,
+    last_name_norm TEXT NOT NULL,
+    city TEXT NOT NULL,
+    country TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email_norm ON users (email_norm);
+CREATE INDEX IF NOT EXISTS users_last_name_norm ON users (last_name_norm);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id_norm TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total REAL NOT NULL,
+    currency TEXT NOT NULL,
+    items TEXT NOT NULL,
+    ordered_at TEXT NOT NULL,
+    shipped_at TEXT,
+    delivered_at TEXT,
+    carrier TEXT,
+    tracking_number TEXT,
+    destination_city TEXT NOT NULL,
+    destination_country TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_user_ordered_at ON orders (user_id, ordered_at DESC);
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_USER_COLUMNS = ("id", "name", "email", "email_norm", "last_name_norm", "city", "country")
+_ORDER_COLUMNS = (
+    "id_norm",
+    "id",
+    "user_id",
+    "status",
+    "total",
+    "currency",
+    "items",
+    "ordered_at",
+    "shipped_at",
+    "delivered_at",
+    "carrier",
+    "tracking_number",
+    "destination_city",
+    "destination_country",
+)
+
+
+def _upsert(table: str, columns: tuple[str, ...]) -> str:
+    # ON CONFLICT DO UPDATE rather than INSERT OR REPLACE, so the update
+    # triggers below see the previous row.
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT ({columns[0]}) DO UPDATE SET "
+        + ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+    )
+
+
+_UPSERT_USER = _upsert("users", _USER_COLUMNS)
+_UPSERT_ORDER = _upsert("orders", _ORDER_COLUMNS)
+
+
+def _changed(columns: tuple[str, ...]) -> str:
+    old = ", ".join(f"OLD.{c}" for c in columns)
+    new = ", ".join(f"NEW.{c}" for c in columns)
+    return f"({old}) IS NOT ({new})"
+
+
+def _bump_versions(select: str) -> str:
+    return (
+        f"INSERT INTO data_versions (key, version) {select} "
+        "ON CONFLICT (key) DO UPDATE SET version = version + 1;"
+    )
+
+
+def _bump_order(row: str) -> str:
+    return _bump_versions(f"VALUES ('order:' || {row}.id_norm, 1)")
+
+
+def _bump_customer(user_id: str, condition: str = "TRUE") -> str:
+    return _bump_versions(
+        f"SELECT 'email:' || email_norm, 1 FROM users WHERE id = {user_id} AND {condition}"
+    )
+
+
+def _bump_email(email_norm: str, condition: str = "TRUE") -> str:
+    return _bump_versions(f"SELECT 'email:' || {email_norm}, 1 WHERE {condition}")
+
+
+def _bump_user_orders(row: str) -> str:
+    return _bump_versions(
+        f"SELECT 'order:' || id_norm, 1 FROM orders WHERE user_id = {row}.id"
+    )
+
+
+# Version stamps (see OrderRepository) are maintained by triggers, so writes from
+# any process, including the bulk loader, invalidate cached tool results.
+_VERSION_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS orders_version_insert AFTER INSERT ON orders BEGIN
+    {_bump_order("NEW")}
+    {_bump_customer("NEW.user_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS orders_version_update AFTER UPDATE ON orders
+WHEN {_changed(_ORDER_COLUMNS)} BEGIN
+    {_bump_order("NEW")}
+    {_bump_customer("NEW.user_id")}
+    {_bump_customer("OLD.user_id", "OLD.user_id IS NOT NEW.user_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS orders_version_delete AFTER DELETE ON orders BEGIN
+    {_bump_order("OLD")}
+    {_bump_customer("OLD.user_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users BEGIN
+    {_bump_email("NEW.email_norm")}
+    {_bump_user_orders("NEW")}
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+WHEN {_changed(_USER_COLUMNS)} BEGIN
+    {_bump_email("OLD.email_norm")}
+    {_bump_email("NEW.email_norm", "NEW.email_norm IS NOT OLD.email_norm")}
+    {_bump_user_orders("NEW")}
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users BEGIN
+    {_bump_email("OLD.email_norm")}
+    {_bump_user_orders("OLD")}
+END;
+"""
+
+
+def _normalize(s: str) -> str:
+    return s.strip().lower()
+
+
+def _parse_date(value: Any) -> date | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def _user_row(user: User) -> tuple[Any, ...]:
+    name = user.name
+    last_name = _normalize(name.split()[-1]) if name.strip() else ""
+    return (
+        user.id,
+        name,
+        user.email,
+        _normalize(user.email),
+        last_name,
+        user.city,
+        user.country,
+    )
+
+
+def _order_row(order: Order) -> tuple[Any, ...]:
+    return (
+        _normalize(order.id),
+        order.id,
+        order.user_id,
+        order.status,
+        order.total,
+        order.currency,
+        json.dumps([item.to_dict() for item in order.items], ensure_ascii=False),
+        order.ordered_at.isoformat(),
+        order.shipped_at.isoformat() if order.shipped_at else None,
+        order.delivered_at.isoformat() if order.delivered_at else None,
+        order.carrier,
+        order.tracking_number,
+        order.destination_city,
+        order.destination_country,
+    )
+
+
+def _items_from_json(items: Any) -> tuple[OrderItem, ...]:
+    if isinstance(items, str):
+        items = json.loads(items)
+    return tuple(
+        OrderItem(
+            sku=str(item["sku"]),
+            title=str(item["title"]),
+            quantity=int(item["quantity"]),
+            unit_price=float(item["unit_price"]),
+        )
+        for item in items or ()
+    )
+
+
+def _row_to_user(row: sqlite3.Row) -> User:
+    return User(
+        id=row["id"],
+        name=row["name"],
+        email=row["email"],
+        city=row["city"],
+        country=row["country"],
+    )
+
+
+def _row_to_order(row: sqlite3.Row) -> Order:
+    return Order(
+        id=row["id"],
+        user_id=row["user_id"],
+        status=row["status"],
+        total=row["total"],
+        currency=row["currency"],
+        items=_items_from_json(row["items"]),
+        ordered_at=date.fromisoformat(row["ordered_at"]),
+        shipped_at=_parse_date(row["shipped_at"]),
+        delivered_at=_parse_date(row["delivered_at"]),
+        carrier=row["carrier"],
+        tracking_number=row["tracking_number"],
+        destination_city=row["destination_city"],
+        destination_country=row["destination_country"],
+    )
+
+
+class SqliteOrderStore:
+    """
+    SQLite-backed order repository shared on disk by every worker process.
+
+    Each process keeps its own small pool of connections; the pool is recreated
+    after a fork so connections are never shared across processes.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], pool_size: int = 4) -> None:
+        self._path = str(path)
+        self._pool_size = max(1, pool_size)
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._pool_pid = os.getpid()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA + _VERSION_TRIGGERS)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        if self._pool_pid != os.getpid():
+            self._pool = queue.LifoQueue()
+            self._pool_pid = os.getpid()
+
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._pool.qsize() < self._pool_size:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    def get_user(self, user_id: str) -> User | None:
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+        return _row_to_user(row) if row else None
+
+    def get_order(self, order_id: str) -> Order | None:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM orders WHERE id_norm = ?", (_normalize(order_id),)
+            ).fetchone()
+        return _row_to_order(row) if row else None
+
+    def users_by_email(self, email: str) -> list[User]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM users WHERE email_norm = ?", (_normalize(email),)
+            ).fetchall()
+        return [_row_to_user(r) for r in rows]
+
+    def users_by_last_name(self, last_name: str) -> list[User]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM users WHERE last_name_norm = ?", (_normalize(last_name),)
+            ).fetchall()
+        return [_row_to_user(r) for r in rows]
+
+    def recent_orders_for_user(self, user_id: str, limit: int | None = None) -> list[Order]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM orders WHERE user_id = ? "
+                "ORDER BY ordered_at DESC, id_norm DESC LIMIT ?",
+                (user_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [_row_to_order(r) for r in rows]
+
+    def iter_orders(self) -> Iterator[Order]:
+        """
+        Stream every order, in no particular order, without loading them all at once.
+        """
+        with self._connection() as conn:
+            for row in conn.execute("SELECT * FROM orders"):
+                yield _row_to_order(row)
+
+    def order_version(self, order_id: str) -> int:
+        return self._version("order:" + _normalize(order_id))
+
+    def customer_version(self, email: str) -> int:
+        return self._version("email:" + _normalize(email))
+
+    def _version(self, key: str) -> int:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT version FROM data_versions WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def upsert_user(self, user: User) -> None:
+        with self._connection() as conn:
+            conn.execute(_UPSERT_USER, _user_row(user))
+
+    def upsert_order(self, order: Order) -> None:
+        with self._connection() as conn:
+            conn.execute(_UPSERT_ORDER, _order_row(order))
+
+    def remove_order(self, order_id: str) -> Order | None:
+        with self._connection() as conn:
+            row = conn.execute(
+                "DELETE FROM orders WHERE id_norm = ? RETURNING *", (_normalize(order_id),)
+            ).fetchone()
+        return _row_to_order(row) if row else None
+
+    def bulk_load(
+        self,
+        users: Iterable[User] = (),
+        orders: Iterable[Order] = (),
+    ) -> tuple[int, int]:
+        """
+        Insert or replace users and orders in a single transaction.
+
+        Rows are streamed straight into executemany, so memory use stays flat no
+        matter how large the input is. Returns the (users, orders) row counts.
+        """
+        counts = [0, 0]
+
+        def counted(rows: Iterable[tuple[Any, ...]], slot: int) -> Iterator[tuple[Any, ...]]:
+            for row in rows:
+                counts[slot] += 1
+                yield row
+
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_UPSERT_USER, counted(map(_user_row, users), 0))
+                conn.executemany(_UPSERT_ORDER, counted(map(_order_row, orders), 1))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return counts[0], counts[1]
+
+
+def _read_records(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _none_if_blank(value: Any) -> Any:
+    return None if value == "" else value
+
+
+def read_users(path: Path) -> Iterator[User]:
+    """
+    Stream users from a CSV or JSONL file with the User field names.
+    """
+    for record in _read_records(path):
+        yield User(
+            id=str(record["id"]),
+            name=str(record["name"]),
+            email=str(record["email"]),
+            city=str(record["city"]),
+            country=str(record["country"]),
+        )
+
+
+def read_orders(path: Path) -> Iterator[Order]:
+    """
+    Stream orders from a CSV or JSONL file with the Order field names.
+
+    Dates are ISO strings; in CSV files `items` is a JSON-encoded list.
+    """
+    for record in _read_records(path):
+        ordered_at = _parse_date(record["ordered_at"])
+        if ordered_at is None:
+            raise ValueError(f"Order {record.get('id')!r} is missing ordered_at.")
+        yield Order(
+            id=str(record["id"]),
+            user_id=str(record["user_id"]),
+            status=str(record["status"]),
+            total=float(record["total"]),
+            currency=str(record["currency"]),
+            items=_items_from_json(record.get("items")),
+            ordered_at=ordered_at,
+            shipped_at=_parse_date(record.get("shipped_at")),
+            delivered_at=_parse_date(record.get("delivered_at")),
+            carrier=_none_if_blank(record.get("carrier")),
+            tracking_number=_none_if_blank(record.get("tracking_number")),
+            destination_city=str(record["destination_city"]),
+            destination_country=str(record["destination_country"]),
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Bulk-load users and orders into a Bookly SQLite order store."
+    )
+    parser.add_argument("database", help="Path to the SQLite database file.")
+    parser.add_argument("--users", type=Path, help="CSV or JSONL file of users.")
+    parser.add_argument("--orders", type=Path, help="CSV or JSONL file of orders.")
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Load the built-in synthetic users and orders.",
+    )
+    args = parser.parse_args(argv)
+
+    store = SqliteOrderStore(args.database, pool_size=1)
+    users: Iterable[User] = read_users(args.users) if args.users else ()
+    orders: Iterable[Order] = read_orders(args.orders) if args.orders else ()
+    if args.synthetic:
+        # Same transaction as the files, so a bad file leaves no demo data behind.
+        users = chain(USERS, users)
+        orders = chain(ORDERS, orders)
+    n_users, n_orders = store.bulk_load(users, orders)
+    print(f"Loaded {n_users} users and {n_orders} orders into {args.database}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Iterator
+from datetime import date
+from functools import lru_cache
+from typing import Protocol
+
+from ..config import get_settings
+from .data import ORDERS, USERS, Order, User
+
+
+def _normalize(s: str) -> str:
+    return s.strip().lower()
+
+
+def _last_name(user: User) -> str:
+    return _normalize(user.name.split()[-1]) if user.name.strip() else ""
+
+
+class OrderRepository(Protocol):
+    """
+    Storage interface behind the order tools.
+
+    Order ids, emails and last names are matched case-insensitively; the
+    implementation is responsible for normalizing them.
+
+    Version stamps let callers cache tool results: order_version changes whenever
+    the order or its customer record changes (including the order being created
+    or removed), and customer_version whenever any order of a customer with that
+    email, or the customer record itself, does. Stamps start at 0 and only grow.
+    """
+
+    def get_user(self, user_id: str) -> User | None: ...
+
+    def get_order(self, order_id: str) -> Order | None: ...
+
+    def users_by_email(self, email: str) -> list[User]: ...
+
+    def users_by_last_name(self, last_name: str) -> list[User]: ...
+
+    def recent_orders_for_user(
+        self, user_id: str, limit: int | None = None
+    ) -> list[Order]: ...
+
+    def iter_orders(self) -> Iterator[Order]: ...
+
+    def order_version(self, order_id: str) -> int: ...
+
+    def customer_version(self, email: str) -> int: ...
+
+    def upsert_user(self, user: User) -> None: ...
+
+    def upsert_order(self, order: Order) -> None: ...
+
+    def remove_order(self, order_id: str) -> Order | None: ...
+
+
+class OrderStore:
+    """
+    In-memory order and user store with prebuilt lookup indexes.
+
+    Indexes are maintained incrementally by upsert_user, upsert_order and
+    remove_order, so lookups never scan the full dataset:
+    - orders by normalized order id,
+    - users by id, normalized email and normalized last name,
+    - per-user order keys presorted by ordered_at.
+    Version stamps are kept in the same pass.
+    """
+
+    def __init__(self, users: Iterable[User] = (), orders: Iterable[Order] = ()) -> None:
+        self._lock = threading.Lock()
+        self._users_by_id: dict[str, User] = {}
+        self._user_ids_by_email: dict[str, set[str]] = {}
+        self._user_ids_by_last_name: dict[str, set[str]] = {}
+        self._orders_by_id: dict[str, Order] = {}
+        # Sorted ascending by (ordered_at, normalized order id); read newest-first.
+        self._order_keys_by_user: dict[str, list[tuple[date, str]]] = {}
+        # Keyed by ("order", normalized id) and ("email", normalized email).
+        self._versions: dict[tuple[str, str], int] = {}
+
+        for user in users:
+            self.upsert_user(user)
+        for order in orders:
+            self.upsert_order(order)
+
+    def get_user(self, user_id: str) -> User | None:
+        return self._users_by_id.get(user_id)
+
+    def get_order(self, order_id: str) -> Order | None:
+        return self._orders_by_id.get(_normalize(order_id))
+
+    def users_by_email(self, email: str) -> list[User]:
+        ids = self._user_ids_by_email.get(_normalize(email), ())
+        return [self._users_by_id[i] for i in ids]
+
+    def users_by_last_name(self, last_name: str) -> list[User]:
+        ids = self._user_ids_by_last_name.get(_normalize(last_name), ())
+        return [self._users_by_id[i] for i in ids]
+
+    def recent_orders_for_user(self, user_id: str, limit: int | None = None) -> list[Order]:
+        """
+        Return a user's orders newest first, touching at most `limit` entries.
+        """
+        keys = self._order_keys_by_user.get(user_id, [])
+        stop = len(keys) - limit - 1 if limit is not None and limit < len(keys) else None
+        return [self._orders_by_id[k] for _, k in keys[-1:stop:-1]]
+
+    def iter_orders(self) -> Iterator[Order]:
+        """
+        Iterate over every order, in no particular order.
+        """
+        # A snapshot, so concurrent upserts cannot break the iteration.
+        with self._lock:
+            orders = list(self._orders_by_id.values())
+        return iter(orders)
+
+    def order_version(self, order_id: str) -> int:
+        return self._versions.get(("order", _normalize(order_id)), 0)
+
+    def customer_version(self, email: str) -> int:
+        return self._versions.get(("email", _normalize(email)), 0)
+
+    def upsert_user(self, user: User) -> None:
+        with self._lock:
+            previous = self._users_by_id.get(user.id)
+            if previous is not None:
+                self._discard(self._user_ids_by_email, _normalize(previous.email), user.id)
+                self._discard(self._user_ids_by_last_name, _last_name(previous), user.id)
+            if previous != user:
+                # Lookups match on the customer's email and name.
+                if previous is not None:
+                    self._bump("email", _normalize(previous.email))
+                self._bump("email", _normalize(user.email))
+                for _, key in self._order_keys_by_user.get(user.id, ()):
+                    self._bump("order", key)
+
+            self._users_by_id[user.id] = user
+            self._user_ids_by_email.setdefault(_normalize(user.email), set()).add(user.id)
+            self._user_ids_by_last_name.setdefault(_last_name(user), set()).add(user.id)
+
+    def upsert_order(self, order: Order) -> None:
+        key = _normalize(order.id)
+        with self._lock:
+            previous = self._orders_by_id.get(key)
+            if previous is not None:
+                self._remove_order_key(previous, key)
+            if previous != order:
+                self._bump("order", key)
+                self._bump_customer(order.user_id)
+                if previous is not None and previous.user_id != order.user_id:
+                    self._bump_customer(previous.user_id)
+
+            self._orders_by_id[key] = order
+            insort(
+                self._order_keys_by_user.setdefault(order.user_id, []),
+                (order.ordered_at, key),
+            )
+
+    def remove_order(self, order_id: str) -> Order | None:
+        key = _normalize(order_id)
+        with self._lock:
+            order = self._orders_by_id.pop(key, None)
+            if order is not None:
+                self._remove_order_key(order, key)
+                self._bump("order", key)
+                self._bump_customer(order.user_id)
+            return order
+
+    def _bump(self, kind: str, key: str) -> None:
+        self._versions[kind, key] = self._versions.get((kind, key), 0) + 1
+
+    def _bump_customer(self, user_id: str) -> None:
+        user = self._users_by_id.get(user_id)
+        if user is not None:
+            self._bump("email", _normalize(user.email))
+
+    def _remove_order_key(self, order: Order, key: str) -> None:
+        keys = self._order_keys_by_user.get(order.user_id)
+        if not keys:
+            return
+        entry = (order.ordered_at, key)
+        i = bisect_left(keys, entry)
+        if i < len(keys) and keys[i] == entry:
+            del keys[i]
+        if not keys:
+            del self._order_keys_by_user[order.user_id]
+
+    @staticmethod
+    def _discard(index: dict[str, set[str]], key: str, user_id: str) -> None:
+        ids = index.get(key)
+        if ids is None:
+            return
+        ids.discard(user_id)
+        if not ids:
+            del index[key]
+
+
+@lru_cache(maxsize=1)
+def get_order_store() -> OrderRepository:
+    """
+    Return the process-wide order repository selected by ORDER_STORE_BACKEND.
+
+    The default in-memory backend is indexed once from the synthetic dataset; the
+    sqlite backend reads a shared on-disk database populated by the bulk loader.
+    """
+    settings = get_settings()
+    if settings["order_store_backend"] == "sqlite":
+        from .sqlite_store import SqliteOrderStore
+
+        return SqliteOrderStore(
+            settings["order_store_path"],
+            pool_size=settings["order_store_pool_size"],
+        )
+    return OrderStore(USERS, ORDERS)
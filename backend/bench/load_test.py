@@ -0,0 +1,196 @@
+"""
+Drive /chat at a fixed concurrency and report latency, throughput and LLM calls.
+
+    python -m bench.load_test --url http://localhost:8000 --requests 500 --concurrency 50
+    python -m bench.load_test --output run.json --baseline baseline.json
+
+With --baseline, exits non-zero when p95 latency or LLM calls per turn regress
+beyond --max-regression compared with a previous --output file; estimated
+LLM spend per turn is reported and compared too.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+
+# One representative conversation per action type the agent can take.
+SCENARIOS: tuple[tuple[str, list[dict[str, str]]], ...] = (
+    ("policy", [{"role": "user", "content": "What's your shipping time?"}]),
+    (
+        "lookup_order",
+        [{"role": "user", "content": "Where is order B-1001? My email is alice@example.com."}],
+    ),
+    ("recent_orders", [{"role": "user", "content": "My email is brian@example.com."}]),
+    (
+        "refund",
+        [{"role": "user", "content": "I want a refund for B-1001, the book arrived damaged."}],
+    ),
+    ("clarification", [{"role": "user", "content": "Where is my order?"}]),
+    ("out_of_scope", [{"role": "user", "content": "Can you recommend a good laptop?"}]),
+)
+
+
+@dataclass
+class Sample:
+    scenario: str
+    action: str
+    latency: float
+    llm_calls: int
+    ok: bool
+    cost_usd: float = 0.0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile; 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _one(client: httpx.AsyncClient, index: int) -> Sample:
+    scenario, messages = SCENARIOS[index % len(SCENARIOS)]
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            "/chat",
+            json={"conversation_id": f"bench-{index}", "messages": messages},
+        )
+        latency = time.perf_counter() - start
+        if response.status_code == 429:
+            # Shed by admission control; reported apart from failures.
+            return Sample(scenario, "shed", latency, 0, False)
+        if response.status_code != 200:
+            return Sample(scenario, "error", latency, 0, False)
+        body = response.json()
+        metadata = body["action_metadata"]
+        action = metadata.get("tool_name") or metadata["action"]
+        llm_calls = int(response.headers.get("X-LLM-Calls", "0"))
+        cost_usd = float(response.headers.get("X-LLM-Cost-USD", "0"))
+        return Sample(scenario, action, latency, llm_calls, True, cost_usd)
+    except httpx.HTTPError:
+        return Sample(scenario, "error", time.perf_counter() - start, 0, False)
+
+
+async def run(url: str, total: int, concurrency: int, timeout: float) -> tuple[list[Sample], float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    samples: list[Sample] = []
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                samples.append(await _one(client, i))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict[str, Any]:
+    def block(group: list[Sample]) -> dict[str, Any]:
+        latencies = [s.latency * 1000 for s in group if s.ok]
+        ok = [s for s in group if s.ok]
+        return {
+            "count": len(group),
+            "errors": len(group) - len(ok),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "llm_calls_per_turn": round(sum(s.llm_calls for s in ok) / len(ok), 2) if ok else 0.0,
+            "cost_per_1k_turns_usd": round(sum(s.cost_usd for s in ok) / len(ok) * 1000, 4)
+            if ok
+            else 0.0,
+        }
+
+    by_action: dict[str, list[Sample]] = defaultdict(list)
+    for s in samples:
+        by_action[s.action].append(s)
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "overall": block(samples),
+        "by_action": {action: block(group) for action, group in sorted(by_action.items())},
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(f"elapsed {report['elapsed_s']}s, throughput {report['throughput_rps']} turns/s")
+    header = (
+        f"{'action':<28}{'count':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}"
+        f"{'llm/turn':>10}{'$/1k turns':>12}"
+    )
+    print(header)
+    print("-" * len(header))
+    rows = [("overall", report["overall"]), *report["by_action"].items()]
+    for name, b in rows:
+        print(
+            f"{name:<28}{b['count']:>7}{b['errors']:>5}{b['p50_ms']:>9}"
+            f"{b['p95_ms']:>9}{b['p99_ms']:>9}{b['llm_calls_per_turn']:>10}"
+            f"{b.get('cost_per_1k_turns_usd', 0.0):>12}"
+        )
+
+
+def _regressions(report: dict[str, Any], baseline: dict[str, Any], limit: float) -> list[str]:
+    problems = []
+    for metric in ("p95_ms", "llm_calls_per_turn", "cost_per_1k_turns_usd"):
+        # Older reports have no cost column; a missing metric is not compared.
+        old = baseline["overall"].get(metric)
+        new = report["overall"][metric]
+        if old and new > old * (1 + limit):
+            problems.append(f"overall {metric} regressed: {old} -> {new}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report.")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    samples, elapsed = asyncio.run(run(args.url, args.requests, args.concurrency, args.timeout))
+    report = summarize(samples, elapsed)
+    _print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = _regressions(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+OpenAI-compatible stand-in LLM server for local benchmarking.
+
+Serves POST /v1/chat/completions (plain, streaming and function calling) with
+configurable latency, token rate and failure injection, so /chat can be load
+tested without calling OpenAI:
+
+    python -m bench.mock_llm --port 8001 --latency-ms 300 --malformed-rate 0.05
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=mock uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    tokens_per_second: float = 80.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    low_confidence_rate: float = 0.0
+    # Base latency per model name, overriding latency_ms.
+    model_latency_ms: dict[str, float] = field(default_factory=dict)
+    seed: int | None = None
+
+
+CONFIG = MockConfig()
+STATS: Counter[str] = Counter()
+_RNG = random.Random()
+
+_ORDER_ID = re.compile(r"\b[bB]-?\d{3,}\b")
+# Same pattern as app.router, so trailing sentence punctuation is not captured.
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+_ANSWER_TEXT = (
+    "Thank you for contacting Bookly. Based on the information on file, your request "
+    "has been reviewed and the relevant details are summarized above. Please let us "
+    "know if there is anything else we can help you with today."
+)
+
+app = FastAPI(title="Mock LLM")
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _decide(last_user: str) -> dict[str, Any]:
+    """
+    Deterministic stand-in for the decision step, keyed off the last user message.
+    """
+    text = last_user.lower()
+    order_id = _ORDER_ID.search(last_user)
+    email = _EMAIL.search(last_user)
+    if order_id and any(w in text for w in ("refund", "return", "damaged")):
+        return {
+            "action": "call_tool",
+            "tool_name": "evaluate_refund_eligibility",
+            "tool_args": {"order_id": order_id.group(0), "reason": last_user},
+        }
+    if order_id and email:
+        return {
+            "action": "call_tool",
+            "tool_name": "lookup_order",
+            "tool_args": {"order_id": order_id.group(0), "email_or_last_name": email.group(0)},
+        }
+    if email:
+        return {
+            "action": "call_tool",
+            "tool_name": "list_recent_orders",
+            "tool_args": {"email": email.group(0)},
+        }
+    for topic in ("shipping", "returns", "refunds", "password"):
+        if topic.rstrip("s") in text:
+            return {
+                "action": "call_tool",
+                "tool_name": "get_policy_answer",
+                "tool_args": {"topic": "password_reset" if topic == "password" else topic},
+            }
+    if "order" in text:
+        return {
+            "action": "ask_clarification",
+            "clarifying_question": "Could you share your order id and the email on the order?",
+        }
+    return {"action": "answer", "answer_text": "I can help with orders, returns and policies."}
+
+
+def _as_tool_call(action: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    if action["action"] == "call_tool":
+        return action["tool_name"], action["tool_args"]
+    if action["action"] == "ask_clarification":
+        return "ask_clarification", {"clarifying_question": action["clarifying_question"]}
+    return "answer", {"answer_text": action["answer_text"]}
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> dict[str, Any]:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+async def _sleep_for(completion_tokens: int, model: str) -> None:
+    latency_ms = CONFIG.model_latency_ms.get(model, CONFIG.latency_ms)
+    delay_ms = latency_ms + _RNG.uniform(-CONFIG.jitter_ms, CONFIG.jitter_ms)
+    delay = max(0.0, delay_ms / 1000) + completion_tokens / CONFIG.tokens_per_second
+    await asyncio.sleep(delay)
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": "mock_error", "code": status}},
+    )
+
+
+@app.get("/stats")
+def stats() -> dict[str, int]:
+    return dict(STATS)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Any:
+    body = await request.json()
+    messages: list[dict[str, Any]] = body.get("messages", [])
+    model = body.get("model", "mock")
+    STATS["requests"] += 1
+    STATS[f"model:{model}"] += 1
+
+    roll = _RNG.random()
+    if roll < CONFIG.error_rate:
+        STATS["errors"] += 1
+        return _error(500, "Injected upstream failure.")
+    if roll < CONFIG.error_rate + CONFIG.rate_limit_rate:
+        STATS["rate_limited"] += 1
+        return _error(429, "Injected rate limit.")
+
+    system = messages[0].get("content", "") if messages else ""
+    last_user = next(
+        (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), ""
+    )
+    prompt_tokens = sum(_count_tokens(str(m.get("content", ""))) for m in messages)
+
+    tool_call: tuple[str, dict[str, Any]] | None = None
+    if body.get("tools"):
+        STATS["tool_decisions"] += 1
+        tool_call = _as_tool_call(_decide(last_user))
+        content = ""
+    elif "Action schema" in system:
+        STATS["decisions"] += 1
+        if _RNG.random() < CONFIG.malformed_rate:
+            STATS["malformed"] += 1
+            content = "Certainly! I will look into that for you right away."
+        else:
+            action = _decide(last_user)
+            low = _RNG.random() < CONFIG.low_confidence_rate
+            STATS["low_confidence"] += low
+            action["confidence"] = 0.3 if low else 0.9
+            content = json.dumps(action)
+    else:
+        STATS["answers"] += 1
+        content = _ANSWER_TEXT
+
+    completion_tokens = _count_tokens(content or json.dumps(tool_call))
+    created = int(time.time())
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+    if body.get("stream"):
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(
+            _stream(completion_id, created, model, content, prompt_tokens, include_usage),
+            media_type="text/event-stream",
+        )
+
+    await _sleep_for(completion_tokens, model)
+    message: dict[str, Any] = {"role": "assistant", "content": content or None}
+    if tool_call is not None:
+        name, args = tool_call
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }
+        ]
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_call else "stop",
+            }
+        ],
+        "usage": _usage(prompt_tokens, completion_tokens),
+    }
+
+
+async def _stream(
+    completion_id: str,
+    created: int,
+    model: str,
+    content: str,
+    prompt_tokens: int,
+    include_usage: bool,
+) -> AsyncIterator[str]:
+    def chunk(choices: list[dict[str, Any]], usage: dict[str, Any] | None = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": choices,
+            "usage": usage,
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    await _sleep_for(0, model)
+    pieces = re.findall(r"\S+\s*", content)
+    for piece in pieces:
+        yield chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+        await asyncio.sleep(_count_tokens(piece) / CONFIG.tokens_per_second)
+    yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+    if include_usage:
+        yield chunk([], _usage(prompt_tokens, _count_tokens(content)))
+    yield "data: [DONE]\n\n"
+
+
+def main(argv: list[str] | None = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=CONFIG.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=CONFIG.jitter_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=CONFIG.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 replies.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of 429 replies.")
+    parser.add_argument(
+        "--malformed-rate",
+        type=float,
+        default=0.0,
+        help="Share of decision replies that are not valid JSON.",
+    )
+    parser.add_argument(
+        "--low-confidence-rate",
+        type=float,
+        default=0.0,
+        help="Share of JSON decisions reported with confidence 0.3 instead of 0.9.",
+    )
+    parser.add_argument(
+        "--model-latency",
+        action="append",
+        default=[],
+        metavar="MODEL=MS",
+        help="Base latency for one model name, e.g. gpt-4o=900; repeatable.",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    CONFIG.latency_ms = args.latency_ms
+    CONFIG.jitter_ms = args.jitter_ms
+    CONFIG.tokens_per_second = args.tokens_per_second
+    CONFIG.error_rate = args.error_rate
+    CONFIG.rate_limit_rate = args.rate_limit_rate
+    CONFIG.malformed_rate = args.malformed_rate
+    CONFIG.low_confidence_rate = args.low_confidence_rate
+    for entry in args.model_latency:
+        model, _, latency_ms = entry.partition("=")
+        CONFIG.model_latency_ms[model] = float(latency_ms)
+    CONFIG.seed = args.seed
+    _RNG.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
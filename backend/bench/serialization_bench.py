@@ -0,0 +1,105 @@
+"""
+Measure the JSON encoding and decoding done in one agent turn, per backend.
+
+    python -m bench.serialization_bench --iterations 20000
+
+"before" is the previous stdlib path (json module plus FastAPI's JSONResponse);
+"stdlib" and "orjson" are app.serialization with each backend forced. No network
+or LLM is involved; the payloads mirror a lookup_order turn.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections.abc import Callable
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app import serialization  # noqa: E402
+from app.schemas import ActionMetadata, ChatMessage, ChatResponse  # noqa: E402
+from app.tools.orders import lookup_order  # noqa: E402
+
+
+DECISION = json.dumps(
+    {
+        "action": "call_tool",
+        "tool_name": "lookup_order",
+        "tool_args": {"order_id": "B-1001", "email_or_last_name": "alice@example.com"},
+    }
+)
+TOOL_RESULT = lookup_order("B-1001", "alice@example.com")
+RESPONSE = ChatResponse(
+    conversation_id="c1d2e3f4",
+    message=ChatMessage(
+        role="assistant",
+        content="Your order B-1001 (The Martian, Ready Player One) was delivered "
+        "by UPS. Tracking number 1Z999AA10123456784.",
+    ),
+    action_metadata=ActionMetadata(
+        action="call_tool",
+        tool_name="lookup_order",
+        tool_args={"order_id": "B-1001", "email_or_last_name": "alice@example.com"},
+    ),
+)
+
+
+def _before_turn() -> None:
+    # Decision parse, answer prompt, answer cache key, /chat response.
+    json.loads(DECISION)
+    json.dumps(TOOL_RESULT, ensure_ascii=False)
+    json.dumps(TOOL_RESULT, ensure_ascii=False, sort_keys=True, default=str)
+    JSONResponse(RESPONSE.model_dump(mode="json"))
+
+
+def _after_turn(
+    encode: Callable[[Any, bool], bytes], decode: Callable[[str | bytes], Any]
+) -> Callable[[], None]:
+    def turn() -> None:
+        decode(DECISION)
+        encode(TOOL_RESULT, False).decode("utf-8")
+        encode(TOOL_RESULT, True)
+        # ORJSONResponse.render with this backend.
+        encode(RESPONSE.model_dump(), False)
+
+    return turn
+
+
+def _time(turn: Callable[[], None], iterations: int) -> float:
+    for _ in range(min(1000, iterations)):
+        turn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        turn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    turns: dict[str, Callable[[], None]] = {
+        "before": _before_turn,
+        "stdlib": _after_turn(serialization._stdlib_dumps, json.loads),
+    }
+    orjson_backend = serialization._orjson_backend()
+    if orjson_backend is not None:
+        turns["orjson"] = _after_turn(*orjson_backend)
+
+    baseline = _time(turns["before"], args.iterations)
+    print(f"{'backend':<8} {'us/turn':>9} {'speedup':>8}")
+    for name, turn in turns.items():
+        cost = baseline if name == "before" else _time(turn, args.iterations)
+        print(f"{name:<8} {cost:>9.2f} {baseline / cost:>7.2f}x")
+    if orjson_backend is None:
+        print("orjson is not installed; install it to compare the fast backend.")
+
+
+if __name__ == "__main__":
+    main()
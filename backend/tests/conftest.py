@@ -0,0 +1,4 @@
+import os
+
+# get_settings() requires a key even though no test calls the provider.
+os.environ.setdefault("OPENAI_API_KEY", "test")
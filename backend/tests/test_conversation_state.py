@@ -0,0 +1,58 @@
+from app.conversation_state import (
+    observe_messages,
+    record_tool_calls,
+    state_summary,
+    state_tool_call,
+)
+from app.schemas import ChatMessage
+
+
+def _messages(*turns: tuple[str, str]) -> list[ChatMessage]:
+    return [ChatMessage(role=role, content=content) for role, content in turns]
+
+
+def test_state_carries_over_when_the_history_is_extended() -> None:
+    first = _messages(("user", "Where is order B-1001?"))
+    observe_messages("test-extended", first)
+    state, latest_added = observe_messages(
+        "test-extended",
+        first
+        + _messages(
+            ("assistant", "Can you confirm your email?"),
+            ("user", "alice@example.com"),
+        ),
+    )
+    assert latest_added
+    assert state_tool_call(state) == (
+        "lookup_order",
+        {"order_id": "B-1001", "email_or_last_name": "alice@example.com"},
+    )
+
+
+def test_another_history_under_the_same_id_starts_fresh() -> None:
+    alice = _messages(
+        ("assistant", "Hello, how can I help?"),
+        ("user", "I want a refund for B-1001, alice@example.com"),
+    )
+    observe_messages("test-shared", alice)
+    record_tool_calls(
+        "test-shared",
+        [
+            (
+                "evaluate_refund_eligibility",
+                {"order_id": "B-1001", "reason": "refund"},
+                {"eligible": True},
+            )
+        ],
+    )
+
+    other = _messages(
+        ("assistant", "Hello, how can I help?"),
+        ("user", "Hi"),
+        ("assistant", "Hi! What can I do for you?"),
+        ("user", "I ordered a book last week"),
+        ("user", "where is it, has it shipped?"),
+    )
+    state, _ = observe_messages("test-shared", other)
+    assert state_tool_call(state) is None
+    assert state_summary(state) is None
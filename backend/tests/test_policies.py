@@ -0,0 +1,21 @@
+from app.tools.policies import get_policy_answer
+
+
+def test_clear_free_text_topics_are_answered() -> None:
+    for text, topic in (
+        ("how long does shipping take", "shipping"),
+        ("forgot my password", "password_reset"),
+        ("refund to original payment method", "refunds"),
+    ):
+        answer = get_policy_answer(text)
+        assert answer is not None and answer["topic"] == topic, text
+
+
+def test_weak_or_ambiguous_matches_get_no_canned_answer() -> None:
+    for text in (
+        "how long does a refund take",
+        "cancel my order",
+        "gift cards",
+        "change delivery address",
+    ):
+        assert get_policy_answer(text) is None, text
@@ -0,0 +1,64 @@
+from app.router import extract_entities, follow_up_calls, route_policy_question
+
+
+def test_shipping_cost_questions_go_to_the_llm() -> None:
+    # The shipping template covers delivery times only.
+    assert route_policy_question("What is your shipping policy?") == "shipping"
+    for text in ("What are your shipping costs?", "How much is shipping to Canada?"):
+        assert route_policy_question(text) is None, text
+
+
+def test_refund_requests_set_refund_intent() -> None:
+    for text in (
+        "I want a refund for B-1001",
+        "Can I return my order B-1001? It arrived damaged.",
+        "Is B-1001 returnable?",
+        "I'd like my money back",
+    ):
+        entities = extract_entities(text)
+        assert entities.get("intent") == "refund", text
+        assert entities["reason"] == text
+
+
+def test_other_uses_of_return_are_not_refund_requests() -> None:
+    for text in (
+        "I'll return to this later",
+        "what's your return address?",
+        "Thanks, I will return to the site tomorrow",
+    ):
+        assert extract_entities(text).get("intent") != "refund", text
+
+
+def test_return_address_question_keeps_status_intent() -> None:
+    entities = extract_entities("Where is B-1001? And what's your return address?")
+    assert entities["intent"] == "status"
+    assert entities["order_id"] == "B-1001"
+
+
+def test_last_order_follow_up_needs_a_refund_request() -> None:
+    result = {"orders": [{"id": "B-1002"}]}
+    args = {"email": "alice@example.com"}
+    assert follow_up_calls(
+        "Can I return my last order?", "list_recent_orders", args, result
+    ) == [
+        (
+            "evaluate_refund_eligibility",
+            {"order_id": "B-1002", "reason": "Can I return my last order?"},
+        )
+    ]
+    assert follow_up_calls(
+        "Where is my last order? I'll return to this later", "list_recent_orders", args, result
+    ) == [("lookup_order", {"order_id": "B-1002", "email_or_last_name": "alice@example.com"})]
+
+
+def test_return_later_does_not_start_a_refund_check() -> None:
+    from app.conversation_state import observe_messages, state_tool_call
+    from app.schemas import ChatMessage
+
+    messages = [
+        ChatMessage(role="user", content="What's in order B-1001?"),
+        ChatMessage(role="assistant", content="Can you confirm your email?"),
+        ChatMessage(role="user", content="I'll return to this later"),
+    ]
+    state, _ = observe_messages("test-return-later", messages)
+    assert state_tool_call(state) is None
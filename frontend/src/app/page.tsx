@@ -44,6 +44,8 @@ export default function Home() {
   const [messages, setMessages] = useState<Message[]>(INITIAL_MESSAGES);
   const [input, setInput] = useState("");
   const [isSending, setIsSending] = useState(false);
+  // Issued by the backend on the first reply; keys this chat's server-side state.
+  const [conversationId, setConversationId] = useState<string | null>(null);
 
   async function handleSend() {
     const trimmed = input.trim();
@@ -62,7 +64,7 @@ export default function Home() {
 
     try {
       const payload = {
-        conversation_id: "web-session",
+        ...(conversationId ? { conversation_id: conversationId } : {}),
         messages: nextMessages.map((m) => ({
           role: m.role,
           content: m.content,
@@ -82,6 +84,7 @@ export default function Home() {
       }
 
       const data = await response.json();
+      setConversationId(data.conversation_id as string);
       const assistant = data.message as { role: Role; content: string };
       const meta = data.action_metadata as {
         action: string;